@@ -1,165 +1,110 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import deque
-import heapq
-
-
-def uninformed_path_finder(cities, roads, start_city, goal_city, strategy):
-
-    def bfs(start, goal):
-        queue = deque([(start, [start])])
-        visited = set([start])
-
-        while queue:
-            city, path = queue.popleft()
-            if city == goal:
-                return path, len(path) - 1
-            for neighbor, _ in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-        return None, None
-
-    def dfs(start, goal):
-        stack = [(start, [start])]
-        visited = set([start])
-        while stack:
-            city, path = stack.pop()
-            if city == goal:
-                return path, len(path) - 1
-            for neighbor, _ in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    stack.append((neighbor, path + [neighbor]))
-
-        return None, None
-    def bfs_weighted(start, goal):
-        pq = [(0, start, [start])]
-        visited = set([start])
-
-        while pq:
-            cost, city, path = heapq.heappop(pq)
-            if city == goal:
-                return path, cost
-            for neighbor, distance in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    heapq.heappush(pq, (cost + distance, neighbor, path + [neighbor]))
-        return None, None
-
-    if strategy == 'bfs':
-        return bfs(start_city, goal_city)
-    elif strategy == 'dfs':
-        return dfs(start_city, goal_city)
-    elif strategy == 'bfs_weighted':
-        return bfs_weighted(start_city, goal_city)
-    else:
-        return None, None  # Invalid strategy
-cities = ['Addis Ababa', 'Bahir Dar', 'Gondar', 'Hawassa', 'Mekelle']
-roads = {
-    'Addis Ababa': [('Bahir Dar', 510), ('Hawassa', 275)],
-    'Bahir Dar': [('Addis Ababa', 510), ('Gondar', 180)],
-    'Gondar': [('Bahir Dar', 180), ('Mekelle', 300)],
-    'Hawassa': [('Addis Ababa', 275)],
-    'Mekelle': [('Gondar', 300)]
-}
-
-start = 'Addis Ababa'
-goal = 'Mekelle'
-strategy = 'bfs'
-path, cost = uninformed_path_finder(cities, roads, start, goal, strategy)
-print(f"Path: {path}, Cost: {cost}")
-
-
-def uninformed_path_finder(cities, roads, start_city, goal_city, strategy):
-
-    def bfs(start, goal):
-        queue = deque([(start, [start])])
-        visited = set([start])
-        while queue:
-            city, path = queue.popleft()
-            if city == goal:
-                return path, len(path) - 1
-            for neighbor, _ in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-        return None, None
-
-    def dfs(start, goal):
-        stack = [(start, [start])]
-        visited = set([start])
-        while stack:
-            city, path = stack.pop()
-            if city == goal:
-                return path, len(path) - 1
-            for neighbor, _ in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    stack.append((neighbor, path + [neighbor]))
-        return None, None
-    def bfs_weighted(start, goal):
-        pq = [(0, start, [start])]
-        visited = set([start])
-
-        while pq:
-            cost, city, path = heapq.heappop(pq)
-            if city == goal:
-                return path, cost
-            for neighbor, distance in roads.get(city, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    heapq.heappush(pq, (cost + distance, neighbor, path + [neighbor]))
-        return None, None
-    if strategy == 'bfs':
-        return bfs(start_city, goal_city)
-
-    elif strategy == 'dfs':
-        return dfs(start_city, goal_city)
-    elif strategy == 'bfs_weighted':
-        return bfs_weighted(start_city, goal_city)
-    else:
-        return None, None
-def traverse_all_cities(cities, roads, start_city, strategy):
-    path = [start_city]
-    total_cost = 0
-    cities_left = set(cities) - {start_city}
-    current_city = start_city
-    while cities_left:
-        for city in cities_left:
-            sub_path, sub_cost = uninformed_path_finder(cities, roads, current_city, city, strategy)
-            if sub_path:
-                path.extend(sub_path[1:])
-                total_cost += sub_cost
-                cities_left -= set(sub_path)
-                current_city = sub_path[-1]
-                break
-    return path, total_cost
-def visualize_road_network(cities, roads, path=None):
-    G = nx.Graph()
-    for city, neighbors in roads.items():
-        for neighbor, distance in neighbors:
-            G.add_edge(city, neighbor, weight=distance)
-    pos = nx.spring_layout(G)
-    nx.draw(G, pos, with_labels=True, node_size=2000, node_color='lightblue', font_size=12)
-    if path:
-        edges_in_path = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        nx.draw_networkx_edges(G, pos, edgelist=edges_in_path, edge_color='red', width=3)
-    plt.show()
-cities = ['Addis Ababa', 'Bahir Dar', 'Gondar', 'Hawassa', 'Mekelle']
-roads = {
-    'Addis Ababa': [('Bahir Dar', 510), ('Hawassa', 275)],
-    'Bahir Dar': [('Addis Ababa', 510), ('Gondar', 180)],
-    'Gondar': [('Bahir Dar', 180), ('Mekelle', 300)],
-    'Hawassa': [('Addis Ababa', 275)],
-    'Mekelle': [('Gondar', 300)]
-}
-start = 'Addis Ababa'
-goal = 'Mekelle'
-strategy = 'bfs'
-path, cost = uninformed_path_finder(cities, roads, start, goal, strategy)
-print(f"BFS Path: {path}, Cost: {cost}")
-strategy = 'bfs'
-traverse_path, traverse_cost = traverse_all_cities(cities, roads, start, strategy)
-print(f"Travel All Cities Path: {traverse_path}, Total Cost: {traverse_cost}")
-visualize_road_network(cities, roads, traverse_path)
+from distance_matrix import DistanceMatrix
+from graph_search import find_path
+from road_graph import RoadGraph
+from tour_planning import coverage_walk
+
+
+def uninformed_path_finder(cities, roads, start_city, goal_city, strategy, stats=None):
+    # roads may be the usual dict of adjacency lists or an already built RoadGraph;
+    # pass a SearchStats (search_stats.measure) as stats to count the work done
+    graph = roads if isinstance(roads, RoadGraph) else RoadGraph.from_roads(roads, cities)
+
+    if strategy == 'bfs_weighted':
+        strategy = 'ucs'
+    elif strategy not in ('bfs', 'dfs'):
+        return None, None  # Invalid strategy
+    return find_path(graph, start_city, goal_city, strategy, stats=stats)
+cities = ['Addis Ababa', 'Bahir Dar', 'Gondar', 'Hawassa', 'Mekelle']
+roads = {
+    'Addis Ababa': [('Bahir Dar', 510), ('Hawassa', 275)],
+    'Bahir Dar': [('Addis Ababa', 510), ('Gondar', 180)],
+    'Gondar': [('Bahir Dar', 180), ('Mekelle', 300)],
+    'Hawassa': [('Addis Ababa', 275)],
+    'Mekelle': [('Gondar', 300)]
+}
+
+if __name__ == '__main__':
+    start = 'Addis Ababa'
+    goal = 'Mekelle'
+    strategy = 'bfs'
+    path, cost = uninformed_path_finder(cities, roads, start, goal, strategy)
+    print(f"Path: {path}, Cost: {cost}")
+
+def traverse_all_cities(cities, roads, start_city, strategy, method='walk'):
+    # method='walk' follows a spanning tree of the network (near-linear time);
+    # method='greedy' repeatedly heads for the first reachable unvisited city
+    graph = RoadGraph.from_roads(roads, cities)
+    index = graph.index
+    if strategy == 'bfs_weighted':
+        strategy = 'ucs'
+
+    if method == 'walk':
+        walk, walk_cost, unreachable = coverage_walk(
+            graph, index[start_city], [index[city] for city in cities], strategy
+        )
+        if unreachable:
+            raise ValueError(f"No walk from {start_city} reaches: {', '.join(graph.path_names(unreachable))}")
+        return graph.path_names(walk), walk_cost
+    if method != 'greedy':
+        raise ValueError("Invalid method. Use 'walk' or 'greedy'.")
+
+    path = [start_city]
+    total_cost = 0
+    cities_left = set(cities) - {start_city}
+    current_city = start_city
+
+    # Build one search tree per city up front; every leg below is then a table lookup
+    matrix = DistanceMatrix.for_graph(graph, [index[city] for city in cities], strategy)
+    while cities_left:
+        reachable = [city for city in cities_left if matrix.path(index[current_city], index[city])]
+        if not reachable:
+            raise ValueError(f"Cities not reachable from {current_city}: {', '.join(sorted(cities_left))}")
+        # Prefer a city the others left can still be reached from, so a one-way road strands none of them
+        city = next(
+            (
+                city for city in reachable
+                if all(matrix.path(index[city], index[other]) for other in cities_left)
+            ),
+            reachable[0],
+        )
+        sub_path = graph.path_names(matrix.path(index[current_city], index[city]))
+        path.extend(sub_path[1:])
+        total_cost += matrix.distance(index[current_city], index[city])
+        cities_left -= set(sub_path)
+        current_city = city
+    return path, total_cost
+def visualize_road_network(cities, roads, path=None, coordinates=None):
+    # coordinates: optional fixed (x, y) position per city, e.g. (longitude, latitude)
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    from graph_layout import graph_layout
+
+    G = nx.Graph()
+    for city, neighbors in roads.items():
+        for neighbor, distance in neighbors:
+            G.add_edge(city, neighbor, weight=distance)
+    pos = graph_layout(G, coordinates=coordinates)  # Cached per road network
+    nx.draw(G, pos, with_labels=True, node_size=2000, node_color='lightblue', font_size=12)
+    if path:
+        edges_in_path = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        nx.draw_networkx_edges(G, pos, edgelist=edges_in_path, edge_color='red', width=3)
+    plt.show()
+cities = ['Addis Ababa', 'Bahir Dar', 'Gondar', 'Hawassa', 'Mekelle']
+roads = {
+    'Addis Ababa': [('Bahir Dar', 510), ('Hawassa', 275)],
+    'Bahir Dar': [('Addis Ababa', 510), ('Gondar', 180)],
+    'Gondar': [('Bahir Dar', 180), ('Mekelle', 300)],
+    'Hawassa': [('Addis Ababa', 275)],
+    'Mekelle': [('Gondar', 300)]
+}
+if __name__ == '__main__':
+    start = 'Addis Ababa'
+    goal = 'Mekelle'
+    strategy = 'bfs'
+    path, cost = uninformed_path_finder(cities, roads, start, goal, strategy)
+    print(f"BFS Path: {path}, Cost: {cost}")
+    strategy = 'bfs'
+    traverse_path, traverse_cost = traverse_all_cities(cities, roads, start, strategy)
+    print(f"Travel All Cities Path: {traverse_path}, Total Cost: {traverse_cost}")
+    visualize_road_network(cities, roads, traverse_path)
@@ -1,62 +1,458 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import time
+
+from search_stats import SearchStats, measure
+
+# Transposition table entry flags: the stored value is exact, or only a lower /
+# upper bound left by a pruned search
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """Bounded store of searched game positions, evicting the least recently used.
+
+    Keys are (city, is_maximizing_player, visited_mask). Entries are
+    (value, flag, best_move, path, depth); the path is only kept for EXACT
+    entries and depth is the search depth below the city (inf for a full search).
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, value, flag, path, depth=math.inf):
+        if self.max_entries <= 0:
+            return
+        best_move = path[1] if len(path) > 1 else None
+        self.entries[key] = (value, flag, best_move, tuple(path) if flag == EXACT else None, depth)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard_estimates(self):
+        # Depth-limited entries depend on the evaluation function; full searches do not
+        for key in [key for key, entry in self.entries.items() if entry[4] != math.inf]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
 class MiniMaxSearch:
-    def __init__(self, roads):
+    # Maps smaller than this are searched serially; spawning workers costs more
+    parallel_min_cities = 20
+
+    def __init__(self, roads, ordering=None, table_size=100_000, workers=1, track_stats=False):
         self.roads = roads
         self.best_path = []
+        self.table = TranspositionTable(table_size) if table_size else None
+        # Worker processes for full searches (None or 0: one per CPU, 1: serial)
+        self.workers = workers
+        # Move ordering for alpha-beta: None (neighbour list order), 'utility'
+        # (most promising terminal utility first), 'best_move' (the child that was
+        # best for this city in an earlier search first) or a key(node, child, is_max) function
+        self.ordering = ordering
+        self.best_moves = {}
+        self.track_stats = track_stats  # True (or 'memory') to keep a SearchStats of each search
+        self.stats = None
+        # Iterative deepening state: the depth of the last finished iteration,
+        # whether its result is exact, and what the current run may still spend
+        self.depth_reached = None
+        self.complete = True
+        self.principal_moves = {}
+        self._evaluate = None
+        self._cut_off = False
+        self._limits = None
+        self._nodes = 0
+        self.compile()
+
+    def compile(self):
+        """Interns the cities to integer ids and indexes the adversary roads.
+
+        The searches only read the compiled lists. Call this again after editing
+        ``roads`` by hand; set_adversary_edge keeps the index up to date itself.
+        """
+        self.names = list(self.roads)
+        self.index = {city: i for i, city in enumerate(self.names)}
+        # Visited sets are bitmasks over the city ids
+        self.bit = [1 << i for i in range(len(self.names))]
+        self.utility = [self.roads[city]['utility'] for city in self.names]
+        self.terminal = [self.roads[city]['terminal'] for city in self.names]
+        self.children = [()] * len(self.names)  # (rank in neighbour list, child id) of the open roads
+        self.blocked = [frozenset()] * len(self.names)  # Neighbour ids behind adversary roads
+        self.adversary = 0  # Bitmask of the cities with at least one adversary road
+        for u in range(len(self.names)):
+            self._compile_city(u)
+        self.best_moves.clear()
+        if self.table is not None:
+            self.table.clear()
+
+    def _compile_city(self, u):
+        neighbors = self.roads[self.names[u]]['neighbors']
+        self.children[u] = tuple(
+            (rank, self.index[neighbor]) for rank, (neighbor, is_blocked) in enumerate(neighbors) if not is_blocked
+        )
+        self.blocked[u] = frozenset(self.index[neighbor] for neighbor, is_blocked in neighbors if is_blocked)
+        if self.blocked[u]:
+            self.adversary |= self.bit[u]
+        else:
+            self.adversary &= ~self.bit[u]
 
     def is_adversary_edge(self, current_node, neighbor):
         """Returns True if the path between current_node and the neighbor has an adversary."""
-        # Find if any of the neighbors' path is adversarial (has adversary = True)
-        for neighbor_city, is_blocked in self.roads[current_node]['neighbors']:
-            if neighbor_city == neighbor and is_blocked:
-                return True
-        return False
+        return self.index[neighbor] in self.blocked[self.index[current_node]]
+
+    def set_adversary_edge(self, current_node, neighbor, blocked=True):
+        """Puts an adversary on the road from current_node to neighbor (or clears it)."""
+        neighbors = self.roads[current_node]['neighbors']
+        ranks = [rank for rank, (neighbor_city, _) in enumerate(neighbors) if neighbor_city == neighbor]
+        if not ranks:
+            raise ValueError(f"There is no road from {current_node} to {neighbor}.")
+        for rank in ranks:
+            neighbors[rank] = (neighbor, blocked)
+        self._compile_city(self.index[current_node])
+        # Stored results may have crossed the road; the move history is still a fair guess
+        if self.table is not None:
+            self.table.clear()
 
     def minimax(self, current_node, is_maximizing_player, visited):
+        start = self.index[current_node]
+        value, path = self._minimax(start, is_maximizing_player, self._mask(visited), math.inf, len(visited))
+        return value, [self.names[u] for u in path]
+
+    def alphabeta(self, current_node, is_maximizing_player, visited, alpha=-math.inf, beta=math.inf):
+        """Minimax with alpha-beta pruning; returns the same (value, path) as minimax.
+
+        Results strictly inside (alpha, beta) are exact, and so are -inf / inf when
+        the window is open on that side. Otherwise the value is only a bound on
+        the true one and the path is not meaningful.
+        """
+        start = self.index[current_node]
+        mask = self._mask(visited)
+        value, path = self._alphabeta(start, is_maximizing_player, mask, alpha, beta, math.inf, len(visited))
+        return value, [self.names[u] for u in path]
+
+    def _mask(self, visited):
+        mask = 0
+        for city in visited:
+            mask |= self.bit[self.index[city]]
+        return mask
+
+    def _spend(self):
+        # Charges one node to the iterative deepening budget
+        self._nodes += 1
+        node_limit, deadline = self._limits
+        if node_limit is not None and self._nodes > node_limit:
+            raise _OutOfBudget
+        if deadline is not None and self._nodes % 64 == 0 and time.perf_counter() > deadline:
+            raise _OutOfBudget
+
+    def _estimate(self, u, is_maximizing_player):
+        # Value of a non-terminal city where a depth-limited search stops
+        self._cut_off = True
+        if self._evaluate is None:
+            return self.utility[u], [u]
+        return self._evaluate(self.names[u], is_maximizing_player), [u]
+
+    def _minimax(self, u, is_maximizing_player, mask, depth, ply):
+        if self.stats is not None:
+            # Every call expands one game node; the frontier is the recursion depth
+            self.stats.expanded += 1
+            self.stats.peak_frontier = max(self.stats.peak_frontier, ply + 1)
+        if self._limits is not None:
+            self._spend()
+
         # If the current node has an adversary, return an invalid utility.
         # Do not explore adversary paths
-        for neighbor, is_blocked in self.roads[current_node]['neighbors']:
-            if self.is_adversary_edge(current_node, neighbor):
-                return float('-inf'), []  # Blocked due to adversary
+        if self.adversary & self.bit[u]:
+            return -math.inf, []  # Blocked due to adversary
 
         # Base case: if the current node is terminal, return its utility.
-        if self.roads[current_node]['terminal']:
-            return self.roads[current_node]['utility'], [current_node]
+        if self.terminal[u]:
+            return self.utility[u], [u]
+        if depth <= 0:
+            return self._estimate(u, is_maximizing_player)
+
+        # Reuse the result if this position was reached before by another route
+        key = (u, is_maximizing_player, mask)
+        if self.table is not None:
+            entry = self.table.get(key)
+            if entry is not None and entry[1] == EXACT and entry[4] >= depth:
+                self._cut_off |= entry[4] != math.inf
+                return entry[0], list(entry[3])
 
         # Initialize the best value to be maximized or minimized.
-        best_value = float('-inf') if is_maximizing_player else float('inf')
+        best_value = -math.inf if is_maximizing_player else math.inf
         best_path = []
 
-        # Add the current node to the visited set to avoid revisiting it
-        visited.add(current_node)
+        # Mark the current node visited for the subtree to avoid revisiting it
+        child_mask = mask | self.bit[u]
+        cut_off, self._cut_off = self._cut_off, False
 
-        # Explore all neighbors of the current node
-        for neighbor, is_blocked in self.roads[current_node]['neighbors']:
-            # Skip if the neighbor is blocked, already visited, or has an adversary
-            if is_blocked or neighbor in visited:
+        # Explore the open roads of the current node
+        for _, v in self.children[u]:
+            if child_mask & self.bit[v]:
                 continue
 
-            # Recursive call to the minimax function
-            value, path = self.minimax(neighbor, not is_maximizing_player, visited)
+            value, path = self._minimax(v, not is_maximizing_player, child_mask, depth - 1, ply + 1)
 
             if is_maximizing_player and value > best_value:
                 best_value = value
-                best_path = [current_node] + path
+                best_path = [u] + path
             elif not is_maximizing_player and value < best_value:
                 best_value = value
-                best_path = [current_node] + path
+                best_path = [u] + path
+
+        # A subtree that never hit the depth limit holds for every depth
+        if self.table is not None:
+            self.table.store(key, best_value, EXACT, best_path, depth if self._cut_off else math.inf)
+        self._cut_off |= cut_off
+        return best_value, best_path
+
+    def _alphabeta(self, u, is_maximizing_player, mask, alpha, beta, depth, ply):
+        if self.stats is not None:
+            self.stats.expanded += 1
+            self.stats.peak_frontier = max(self.stats.peak_frontier, ply + 1)
+        if self._limits is not None:
+            self._spend()
+
+        # Same adversary, terminal and cutoff rules as minimax
+        if self.adversary & self.bit[u]:
+            return -math.inf, []
+        if self.terminal[u]:
+            return self.utility[u], [u]
+        if depth <= 0:
+            return self._estimate(u, is_maximizing_player)
+
+        key = (u, is_maximizing_player, mask)
+        hint = None
+        if self.table is not None:
+            entry = self.table.get(key)
+            if entry is not None:
+                value, flag, hint, path, entry_depth = entry
+                # Bounds only settle the search when they fall outside the window
+                if entry_depth >= depth:
+                    settled = (
+                        flag == EXACT
+                        or (flag == LOWER and beta != math.inf and value >= beta)
+                        or (flag == UPPER and alpha != -math.inf and value <= alpha)
+                    )
+                    if settled:
+                        self._cut_off |= entry_depth != math.inf
+                        return value, list(path) if flag == EXACT else []
+
+        best_value = -math.inf if is_maximizing_player else math.inf
+        best_path = []
+        best_rank = None  # Position of the chosen child in the neighbour list
+
+        child_mask = mask | self.bit[u]
+        cut_off, self._cut_off = self._cut_off, False
+        for rank, v in self._ordered_children(u, is_maximizing_player, child_mask, hint):
+            # minimax keeps the first listed child among equal values. Children listed
+            # before the current choice are searched with a window nudged past the
+            # best value, so that a tie comes back as an exact value.
+            if is_maximizing_player:
+                low = max(alpha, best_value)
+                if best_rank is not None and rank < best_rank:
+                    low = math.nextafter(low, -math.inf)
+                value, path = self._alphabeta(v, False, child_mask, low, beta, depth - 1, ply + 1)
+                if value > best_value or (value == best_value and best_rank is not None and rank < best_rank):
+                    best_value, best_path, best_rank = value, [u] + path, rank
+                if beta != math.inf and best_value >= beta:
+                    break
+            else:
+                high = min(beta, best_value)
+                if best_rank is not None and rank < best_rank:
+                    high = math.nextafter(high, math.inf)
+                value, path = self._alphabeta(v, True, child_mask, alpha, high, depth - 1, ply + 1)
+                if value < best_value or (value == best_value and best_rank is not None and rank < best_rank):
+                    best_value, best_path, best_rank = value, [u] + path, rank
+                if alpha != -math.inf and best_value <= alpha:
+                    break
+
+        if best_rank is not None and len(best_path) > 1:
+            self.best_moves[u] = best_path[1]
+        if self.table is not None:
+            if alpha != -math.inf and best_value <= alpha:
+                flag = UPPER
+            elif beta != math.inf and best_value >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.table.store(key, best_value, flag, best_path, depth if self._cut_off else math.inf)
+        self._cut_off |= cut_off
+        return best_value, best_path
+
+    def _ordered_children(self, u, is_maximizing_player, mask, hint=None):
+        # (rank, child) pairs for the children minimax would explore, in search order
+        children = [(rank, v) for rank, v in self.children[u] if not mask & self.bit[v]]
+        if self.ordering == 'utility':
+            sign = -1 if is_maximizing_player else 1
+            children.sort(key=lambda child: sign * self.utility[child[1]])
+        elif self.ordering == 'best_move':
+            # The table's move for this exact position beats the per-city history
+            best = hint if hint is not None else self.best_moves.get(u)
+            children.sort(key=lambda child: child[1] != best)
+        elif callable(self.ordering):
+            names = self.names
+            children.sort(key=lambda child: self.ordering(names[u], names[child[1]], is_maximizing_player))
+        elif self.ordering is not None:
+            raise ValueError("Invalid ordering. Use None, 'utility', 'best_move' or a key function.")
+        # The previous iteration's principal variation goes first
+        principal = self.principal_moves.get(u)
+        if principal is not None:
+            children.sort(key=lambda child: child[1] != principal)
+        return children
+
+    def get_best_path(self, start_node, pruning=True, max_depth=None, time_limit=None, node_limit=None,
+                      evaluate=None):
+        """Best path and value for the maximizing player from start_node.
 
-        # Remove the current node from the visited set when backtracking
-        visited.remove(current_node)
+        With none of max_depth, time_limit (seconds) or node_limit the game is
+        searched to the end. Otherwise the search deepens one ply at a time and
+        returns the result of the deepest finished iteration, scoring the cities
+        where it stops with evaluate(city, is_maximizing_player) (default: the
+        city's utility). depth_reached and complete tell how far it got.
 
+        Full searches use self.workers processes; budgeted ones always run serially.
+        """
+        start = self.index[start_node]
+
+        with measure(self.track_stats) as self.stats:
+            if max_depth is None and time_limit is None and node_limit is None:
+                value, path = self._parallel_search(start, pruning)
+                self.depth_reached, self.complete = None, True
+            else:
+                value, path = self._iterative_deepening(start, pruning, max_depth, time_limit, node_limit, evaluate)
+        self.best_path = [self.names[u] for u in path]
+        return self.best_path, value
+
+    def _search(self, start, pruning, depth):
+        # pruning=False runs plain minimax; both return the same path and value
+        if pruning:
+            return self._alphabeta(start, True, 0, -math.inf, math.inf, depth, 0)
+        return self._minimax(start, True, 0, depth, 0)
+
+    def _parallel_search(self, start, pruning):
+        # Root split: the first child is searched here for a bound, the others in worker processes
+        workers = self.workers or os.cpu_count() or 1
+        if workers <= 1 or len(self.names) < self.parallel_min_cities:
+            return self._search(start, pruning, math.inf)
+        if self.adversary & self.bit[start] or self.terminal[start]:
+            return self._search(start, pruning, math.inf)
+        mask = self.bit[start]
+        children = self._ordered_children(start, True, mask)
+        if len(children) < 3:
+            return self._search(start, pruning, math.inf)
+
+        first_rank, first = children[0]
+        if pruning:
+            value, path = self._alphabeta(first, False, mask, -math.inf, math.inf, math.inf, 1)
+        else:
+            value, path = self._minimax(first, False, mask, math.inf, 1)
+        results = [(first_rank, value, path)]
+
+        # Same tie windows as _alphabeta, all relative to the first child's value
+        tasks = []
+        for rank, v in children[1:]:
+            low = value if pruning else -math.inf
+            if rank < first_rank:
+                low = math.nextafter(low, -math.inf)
+            tasks.append((v, mask, pruning, low, self.stats is not None))
+        table_size = self.table.max_entries if self.table is not None else 0
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(self.roads, self.ordering, table_size),
+        ) as executor:
+            for (rank, _), (value, path, expanded, peak) in zip(children[1:], executor.map(_search_subtree, tasks)):
+                results.append((rank, value, path))
+                if self.stats is not None:
+                    self.stats.expanded += expanded
+                    self.stats.peak_frontier = max(self.stats.peak_frontier, peak)
+
+        best_value, best_path, best_rank = -math.inf, [], None
+        for rank, value, path in results:
+            if value > best_value or (value == best_value and best_rank is not None and rank < best_rank):
+                best_value, best_path, best_rank = value, [start] + path, rank
+        if self.stats is not None:
+            self.stats.expanded += 1
+        if best_rank is not None and len(best_path) > 1:
+            self.best_moves[start] = best_path[1]
         return best_value, best_path
 
-    def get_best_path(self, start_node):
-        # Start the minimax search from the start node with an empty visited set
-        visited = set()
+    def _iterative_deepening(self, start, pruning, max_depth, time_limit, node_limit, evaluate):
+        if evaluate is not self._evaluate and self.table is not None:
+            self.table.discard_estimates()
+        self._evaluate = evaluate
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self._limits = (node_limit, deadline)
+        self._nodes = 0
+        self.principal_moves = {}
+
+        # Until the first iteration finishes, the start city's own estimate is the best there is
+        value, path = self._estimate(start, True)
+        self.depth_reached, self.complete = 0, False
+        depth = 1
+        try:
+            while max_depth is None or depth <= max_depth:
+                self._cut_off = False
+                value, path = self._search(start, pruning, depth)
+                self.depth_reached, self.complete = depth, not self._cut_off
+                if self.complete:
+                    break
+                self.principal_moves = dict(zip(path, path[1:]))
+                depth += 1
+        except _OutOfBudget:
+            pass
+        finally:
+            self._limits = None
+            self.principal_moves = {}
+        return value, path
+
+
+# Each pool worker keeps its own compiled copy of the game graph, sent once
+# when the worker starts rather than with every subtree
+_worker = None
+
+
+def _init_worker(roads, ordering, table_size):
+    global _worker
+    _worker = MiniMaxSearch(roads, ordering, table_size)
+
+
+def _search_subtree(task):
+    child, mask, pruning, low, track = task
+    _worker.stats = SearchStats() if track else None
+    if pruning:
+        value, path = _worker._alphabeta(child, False, mask, low, math.inf, math.inf, 1)
+    else:
+        value, path = _worker._minimax(child, False, mask, math.inf, 1)
+    if _worker.stats is None:
+        return value, path, 0, 0
+    return value, path, _worker.stats.expanded, _worker.stats.peak_frontier
 
-        value, path = self.minimax(start_node, is_maximizing_player=True, visited=visited)
-        self.best_path = path
-        return path, value
 
 roads = {
     'Shambu': { 'utility': 4, 'neighbors': [('Gedo', False)], 'terminal': True },
@@ -84,11 +480,12 @@ roads = {
 }
 
 
-# Create an instance of the MiniMaxSearch class
-search_agent = MiniMaxSearch(roads)
+if __name__ == '__main__':
+    # Create an instance of the MiniMaxSearch class
+    search_agent = MiniMaxSearch(roads)
 
-# Get the best path starting from a valid city
-best_path, best_value = search_agent.get_best_path('Addis Ababa')  # Start from a non-adversary city
+    # Get the best path starting from a valid city
+    best_path, best_value = search_agent.get_best_path('Addis Ababa')  # Start from a non-adversary city
 
-print("Best path:", best_path)
-print("Best value (utility):", best_value)
+    print("Best path:", best_path)
+    print("Best value (utility):", best_value)
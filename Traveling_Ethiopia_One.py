@@ -1,71 +1,58 @@
 from random import random
 import time
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import deque
+
+import graph_search
+from road_graph import RoadGraph
+from search_stats import measure
 
 class TravelEthiopia:
-    def __init__(self, cities, roads, start=None, goal=None, strategy=None):
+    def __init__(self, cities, roads, start=None, goal=None, strategy=None, track_stats=False, coordinates=None):
         self.cities = cities
         self.roads = roads
         self.start = start
         self.goal = goal
         self.strategy = strategy
         self.order = []  # Stores the order of visited nodes for visualization
+        self.track_stats = track_stats  # True (or 'memory') to keep a SearchStats of each search
+        self.stats = None
+        self.coordinates = coordinates  # Optional fixed (x, y) drawing position per city, e.g. (longitude, latitude)
+
+        # Integer-indexed copy of the road network used by the search engines
+        self.graph = RoadGraph.from_roads(roads, cities)
 
-        # Build the graph for visualization
-        self.G = nx.Graph()
-        for city in roads:
-            for neighbor, _ in roads[city]:
-                self.G.add_edge(city, neighbor)
+        self._G = None  # Drawing graph, see G
 
         # if start is not None and goal is not None and strategy is not None:
         #     result = self.search()
         #     print("Search Result:", result)
 
-    def dfs(self, start, goal):
-        visited = set()
-        stack = [(start, [start])]  # Stack stores tuples of (current city, path)
-
-        while stack:
-            city, path = stack.pop()
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
+    @property
+    def G(self):
+        # NetworkX copy of the roads for drawing. Built on first use, so callers
+        # that only want paths never import networkx.
+        if self._G is None:
+            import networkx as nx
+            self._G = nx.Graph()
+            for city in self.roads:
+                for neighbor, _ in self.roads[city]:
+                    self._G.add_edge(city, neighbor)
+        return self._G
 
-                # Goal check
-                if city == goal:
-                    return path
-
-                # Add neighbors in reverse order to the stack
-                stack.extend(
-                    reversed([(neighbor, path + [neighbor]) for neighbor, _ in self.roads.get(city, [])])
-                )
-
-        return None  # Return None if goal is not found
+    def dfs(self, start, goal):
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path = graph_search.dfs(self.graph, self.graph.index[start], self.graph.index[goal], order, self.stats)
+        self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+        return self.graph.path_names(path)  # None if goal is not found
 
     def bfs(self, start, goal):
-        visited = set()
-        queue = deque([(start, [start])])  # Queue stores tuples of (current city, path)
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path = graph_search.bfs(self.graph, self.graph.index[start], self.graph.index[goal], order, self.stats)
+        self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+        return self.graph.path_names(path)  # None if goal is not found
 
-        while queue:
-            city, path = queue.popleft()
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
-
-                # Goal check
-                if city == goal:
-                    return path
-
-                # Add neighbors to the queue
-                queue.extend(
-                    [(neighbor, path + [neighbor]) for neighbor, _ in self.roads.get(city, [])]
-                )
-
-        return None  # Return None if goal is not found
-
-    def search(self):
+    def search(self, output=None):
         # Reset visit order for each search
         self.order = []
 
@@ -81,34 +68,25 @@ class TravelEthiopia:
         print(result)
 
         # Visualize the search process
-        pos = nx.spring_layout(self.G,  seed=42)
-        self.visualize_search(pos, title)
+        from graph_layout import graph_layout
+
+        pos = graph_layout(self.G, seed=42, coordinates=self.coordinates)  # Cached per road network
+        self.visualize_search(pos, title, output)
 
 
         return result
 
-    def visualize_search(self, pos, title):
-        plt.figure(figsize=(10, 8))
-        for i, node in enumerate(self.order, start=1):
-            plt.clf()
-            plt.title(f"{title} - Step {i}")
-            # Highlight the current node (red for current, green for others)
-            nx.draw(
-                self.G,
-                pos,
-                with_labels=True,
-                node_color=['r' if n == node else 'b' for n in self.G.nodes],
-                node_size=100,
-                font_size=10
-            )
-            plt.draw()
-            plt.pause(2)  # Pause to show each step for 1 second
-
-            # Stop visualization if the goal is reached
-            # print(node, self.goal)
-            if node == self.goal:
-                break
-        plt.show()
+    def visualize_search(self, pos, title, output=None, fps=None):
+        # Replay the visit order, highlighting the current node in red, until the goal.
+        # With output (.gif, .mp4, ...) the animation is saved there instead of shown.
+        from search_animation import animate_search
+
+        animation = animate_search(
+            self.G, pos, self.order, title, stop_at={self.goal}, interval=2000, output=output, fps=fps
+        )
+        if output is None:
+            import matplotlib.pyplot as plt
+            plt.show()
 
 
 cities = [
@@ -211,5 +189,6 @@ roads = {
     'Goba': [('Bale', 0), ('Dega Habur', 0), ('Sof Oumer', 0)]
 }
 
-ethiopia = TravelEthiopia(cities, roads, 'Moyale', 'Nairobi', 'bfs')
-ethiopia.search()
+if __name__ == '__main__':
+    ethiopia = TravelEthiopia(cities, roads, 'Moyale', 'Nairobi', 'bfs')
+    ethiopia.search()
@@ -1,18 +1,36 @@
 from random import random
 import time
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import deque
-import heapq
+
+import graph_search
+from landmarks import LandmarkHeuristic
+from road_graph import RoadGraph
+from search_stats import measure
 
 
 class AStarSearchVisualizer:
-    def __init__(self, roads):
+    def __init__(self, roads, landmarks=4, track_stats=False, coordinates=None):
         self.roads = roads
-        self.graph = self.create_graph()
+        self.track_stats = track_stats  # True (or 'memory') to keep a SearchStats of each search
+        self.stats = None
+        self.coordinates = coordinates  # Optional fixed (x, y) drawing position per city, e.g. (longitude, latitude)
+        self._graph = None  # Drawing graph, see graph
+        self.road_graph = RoadGraph.from_roads(roads)  # Integer-indexed copy used by the search
+
+        # Exact distances to/from a few landmark cities give an admissible heuristic for any goal
+        self.landmarks = LandmarkHeuristic(self.road_graph, landmarks)
+
+    @property
+    def graph(self):
+        # NetworkX graph for drawing, built on first use so that path-only
+        # callers never import networkx
+        if self._graph is None:
+            self._graph = self.create_graph()
+        return self._graph
 
     def create_graph(self):
         # Create a directed graph using NetworkX
+        import networkx as nx
+
         G = nx.Graph()
         for city, data in self.roads.items():
             for neighbor, distance in data['neighbors']:
@@ -23,34 +41,24 @@ class AStarSearchVisualizer:
         # Return the heuristic (straight-line distance to the goal)
         return self.roads[city]['cost']
 
-    def a_star_search(self, start, goal):
-        # Priority queue for the open set (cities to explore)
-        open_set = []
-        heapq.heappush(open_set, (0 + self.heuristic(start), start))
-
-        # Dictionary to store the cost of reaching each city
-        g_costs = {start: 0}
-
-        # Dictionary to store the path taken
-        came_from = {}
-
-        while open_set:
-            # Get the city with the lowest f-cost (g + h)
-            current_f_cost, current_city = heapq.heappop(open_set)
-
-            if current_city == goal:
-                return self.reconstruct_path(came_from, current_city)
-
-            for neighbor, distance in self.roads[current_city]['neighbors']:
-                tentative_g_cost = g_costs[current_city] + distance
-
-                if neighbor not in g_costs or tentative_g_cost < g_costs[neighbor]:
-                    g_costs[neighbor] = tentative_g_cost
-                    f_cost = tentative_g_cost + self.heuristic(neighbor)
-                    heapq.heappush(open_set, (f_cost, neighbor))
-                    came_from[neighbor] = current_city
-
-        return None  # No path found
+    def a_star_search(self, start, goal, queue='heap', heuristic='landmarks'):
+        # heuristic='landmarks' works for every goal; heuristic='cost' uses the
+        # per-city 'cost' column, which is only an estimate of the distance to Moyale
+        s, g = self.road_graph.index[start], self.road_graph.index[goal]
+
+        if heuristic == 'landmarks':
+            estimates = self.landmarks.estimates(g)
+        elif heuristic == 'cost':
+            # Cities without an entry in roads get 0 (still admissible)
+            estimates = [
+                self.heuristic(city) if city in self.roads else 0 for city in self.road_graph.names
+            ]
+        else:
+            raise ValueError("Invalid heuristic. Use 'landmarks' or 'cost'.")
+
+        with measure(self.track_stats) as self.stats:
+            path, _ = graph_search.a_star(self.road_graph, s, g, estimates, queue=queue, stats=self.stats)
+        return self.road_graph.path_names(path)  # None if no path found
 
     def reconstruct_path(self, came_from, current):
         path = []
@@ -62,8 +70,13 @@ class AStarSearchVisualizer:
         return path
 
     def visualize(self, path):
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        from graph_layout import graph_layout
+
         # Draw the graph
-        pos = nx.spring_layout(self.graph, seed=49)  # Position nodes in a circular layout
+        pos = graph_layout(self.graph, seed=49, coordinates=self.coordinates)  # Cached per road network
         plt.figure(figsize=(15, 10))
 
         # Draw all nodes and edges
@@ -170,14 +183,15 @@ roads = {
 }
 
 
-# Instantiate and test the A* search with visualization
-search_visualizer = AStarSearchVisualizer(roads)
-start_city = "Addis Ababa"
-goal_city = "Moyale"
+if __name__ == '__main__':
+    # Instantiate and test the A* search with visualization
+    search_visualizer = AStarSearchVisualizer(roads)
+    start_city = "Addis Ababa"
+    goal_city = "Moyale"
 
-path = search_visualizer.a_star_search(start_city, goal_city)
-if path:
-    print("Optimal path:", " -> ".join(path))
-    search_visualizer.visualize(path)
-else:
-    print("No path found between the specified cities.")
+    path = search_visualizer.a_star_search(start_city, goal_city)
+    if path:
+        print("Optimal path:", " -> ".join(path))
+        search_visualizer.visualize(path)
+    else:
+        print("No path found between the specified cities.")
@@ -1,123 +1,191 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import deque
-import heapq
+import os
 
-def uniform_cost_search(start, goal, roads):
-    # Priority queue to store paths with their costs
-    priority_queue = []
-    heapq.heappush(priority_queue, (0, start, [start]))  # (cost, current_city, path_taken)
+import graph_search
+from contraction_hierarchy import ContractionHierarchy
+from road_graph import RoadGraph
+from search_stats import measure
+from tree_cache import TreeCache
 
-    visited = set()  # To keep track of visited nodes
+def uniform_cost_search(start, goal, roads, queue='heap', stats=None):
+    # roads may be a dict of adjacency lists or an already built RoadGraph
+    graph = roads if isinstance(roads, RoadGraph) else RoadGraph.from_roads(roads)
+    if start not in graph or goal not in graph:
+        return None
 
-    while priority_queue:
-        # Pop the city with the lowest cost
-        current_cost, current_city, path = heapq.heappop(priority_queue)
-
-        # If the current city is the goal, return the cost and path
-        if current_city == goal:
-            return current_cost, path
-
-        # Skip this city if it has already been visited
-        if current_city in visited:
-            continue
-
-        # Mark the current city as visited
-        visited.add(current_city)
-
-        # Explore neighbors
-        for neighbor, cost in roads.get(current_city, []):
-            if neighbor not in visited:
-                heapq.heappush(priority_queue, (current_cost + cost, neighbor, path + [neighbor]))
+    path, cost = graph_search.ucs(graph, graph.index[start], graph.index[goal], queue=queue, stats=stats)
 
     # Return None if there is no path
-    return None
+    if path is None:
+        return None
+    return cost, graph.path_names(path)
 
 
 class TravelEthiopia:
-    def __init__(self, cities, roads, start=None, goal=None, strategy=None):
+    def __init__(self, cities, roads, start=None, goal=None, strategy=None, track_stats=False,
+                 tree_cache_bytes=0, coordinates=None):
         self.cities = cities
+        self._tree_cache_bytes = tree_cache_bytes
         self.roads = roads
         self.start = start
         self.goal = goal
         self.strategy = strategy
         self.order = []  # Stores the order of visited nodes for visualization
-
-        # Build the graph for visualization
-        self.G = nx.Graph()
-        for city in roads:
-            for neighbor, _ in roads[city]:
-                self.G.add_edge(city, neighbor)
+        self.track_stats = track_stats  # True (or 'memory') to keep a SearchStats of each search
+        self.stats = None
+        self.coordinates = coordinates  # Optional fixed (x, y) drawing position per city, e.g. (longitude, latitude)
 
         # if start is not None and goal is not None and strategy is not None:
         #     result = self.search()
         #     print("Search Result:", result)
 
-    def dfs(self, start, goal):
-        visited = set()
-        stack = [(start, [start])]  # Stack stores tuples of (current city, path)
-
-        while stack:
-            city, path = stack.pop()
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
-
-                # Goal check
-                if city == goal:
-                    return path
-
-                # Add neighbors in reverse order to the stack
-                stack.extend(
-                    reversed([(neighbor, path + [neighbor]) for neighbor, _ in self.roads.get(city, [])])
-                )
+    @property
+    def tree_cache_bytes(self):
+        # Memory for cached UCS trees, e.g. 16 << 20; 0 (default) for none.
+        # Changing it resizes the current cache.
+        return self._tree_cache_bytes
+
+    @tree_cache_bytes.setter
+    def tree_cache_bytes(self, max_bytes):
+        self._tree_cache_bytes = max_bytes
+        self.trees.resize(max_bytes)
+
+    @property
+    def roads(self):
+        # A copy of the roads given, kept in step with set_road_length/close_road/
+        # reopen_road. Treat it as read-only: edits to it (or to the dict that was
+        # assigned) are not seen by the searches; assign new roads instead.
+        return self._roads
+
+    @roads.setter
+    def roads(self, roads):
+        # Integer-indexed copy of the road network used by the search engines.
+        # Assigning new roads rebuilds it and empties the tree cache.
+        self._roads = {city: list(neighbors) for city, neighbors in roads.items()}
+        self._G = None  # Drawing graph, see G
+        self.graph = RoadGraph.from_roads(roads, self.cities)
+        self.trees = TreeCache(self.graph, self._tree_cache_bytes)
+        self.hierarchy = None
+
+    @property
+    def G(self):
+        # NetworkX copy of the roads for drawing. Built on first use, so callers
+        # that only want paths never import networkx.
+        if self._G is None:
+            import networkx as nx
+            self._G = nx.Graph()
+            for city in self.roads:
+                for neighbor, _ in self.roads[city]:
+                    self._G.add_edge(city, neighbor)
+        return self._G
+
+    # Road condition updates edit the graph in place, mirror the change into
+    # roads and repair the cached search trees instead of dropping them.
+    # both_ways also updates the road back, if there is one.
+    def set_road_length(self, city, neighbor, length, both_ways=True):
+        change = lambda u, v: self.graph.set_weight(u, v, length)
+        self._update_road(change, self.graph.has_road, city, neighbor, both_ways)
+
+    def close_road(self, city, neighbor, both_ways=True):
+        self._update_road(self.graph.close, self.graph.has_road, city, neighbor, both_ways)
+
+    def reopen_road(self, city, neighbor, both_ways=True):
+        is_closed = lambda u, v: (u, v) in self.graph.closed
+        self._update_road(self.graph.reopen, is_closed, city, neighbor, both_ways)
+
+    def _update_road(self, change, applies, city, neighbor, both_ways):
+        u, v = self.graph.index[city], self.graph.index[neighbor]
+        roads = [(u, v)]
+        if both_ways and applies(v, u):
+            roads.append((v, u))
+        names = self.graph.names
+        for a, b in roads:
+            change(a, b)
+            self.trees.repair(a, b)
+            self._roads[names[a]] = [(names[c], length) for c, length in self.graph.neighbors(a)]
+        self.hierarchy = None  # Rebuilt on the next ch query
+        self._G = None
+
+    def build_hierarchy(self, path=None):
+        # Contraction hierarchy for ch(). With a path it is loaded from that file when
+        # it was built for the current roads, and built and saved there otherwise.
+        if path is not None and os.path.exists(path):
+            hierarchy = ContractionHierarchy.load(path)
+            if hierarchy.fingerprint == self.graph.fingerprint():
+                self.hierarchy = hierarchy
+                return hierarchy
+        self.hierarchy = ContractionHierarchy.build(self.graph)
+        if path is not None:
+            self.hierarchy.save(path)
+        return self.hierarchy
 
-        return None  # Return None if goal is not found
+    def dfs(self, start, goal):
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path = graph_search.dfs(self.graph, self.graph.index[start], self.graph.index[goal], order, self.stats)
+        self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+        return self.graph.path_names(path)  # None if goal is not found
 
     def bfs(self, start, goal):
-        visited = set()
-        queue = deque([(start, [start])])  # Queue stores tuples of (current city, path)
-
-        while queue:
-            city, path = queue.popleft()
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
-
-                # Goal check
-                if city == goal:
-                    return path
-
-                # Add neighbors to the queue
-                queue.extend(
-                    [(neighbor, path + [neighbor]) for neighbor, _ in self.roads.get(city, [])]
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path = graph_search.bfs(self.graph, self.graph.index[start], self.graph.index[goal], order, self.stats)
+        self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+        return self.graph.path_names(path)  # None if goal is not found
+
+    def ucs(self, start, goal, queue='heap'):
+        # queue: 'heap', 'indexed' (decrease-key heap) or 'bucket' (Dial, integer weights).
+        # With the tree cache on (tree_cache_bytes), the first query from a source builds
+        # its whole search tree; later queries from that source only walk predecessors.
+        if not self.tree_cache_bytes:
+            order = []
+            with measure(self.track_stats) as self.stats:
+                path, cost = graph_search.ucs(
+                    self.graph, self.graph.index[start], self.graph.index[goal], order, queue, self.stats
                 )
-
-        return None  # Return None if goal is not found
-
-    def ucs(self, start, goal):
-        visited = set()
-        priority_queue = [(0, start, [start])]  # Priority queue stores (cost, current city, path)
-
-        while priority_queue:
-            cost, city, path = heapq.heappop(priority_queue)
-
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
-
-                # Goal check
-                if city == goal:
-                    return path, cost
-
-                # Add neighbors to the priority queue
-                for neighbor, travel_cost in self.roads.get(city, []):
-                    if neighbor not in visited:
-                        heapq.heappush(priority_queue, (cost + travel_cost, neighbor, path + [neighbor]))
-
-        return None, float('inf')  # Return None and infinite cost if goal is not found
-
-    def search(self):
+            self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+            return self.graph.path_names(path), cost  # None and infinite cost if goal is not found
+
+        source, target = self.graph.index[start], self.graph.index[goal]
+        order = []
+        with measure(self.track_stats) as self.stats:
+            tree = self.trees.tree(source, order, queue, self.stats)
+            path = tree.path(source, target)
+        if path is None:
+            return None, float('inf')
+        # A cached tree expands nothing, so the route itself is replayed instead
+        self.order.extend(self.graph.path_names(order or path))
+        return self.graph.path_names(path), tree.distance(source, target)
+
+    def bibfs(self, start, goal):
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path = graph_search.bidirectional_bfs(
+                self.graph, self.graph.index[start], self.graph.index[goal], order, self.stats
+            )
+        self.order.extend(self.graph.path_names(order))  # Visit order of both directions
+        return self.graph.path_names(path)  # None if goal is not found
+
+    def biucs(self, start, goal, queue='heap'):
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path, cost = graph_search.bidirectional_dijkstra(
+                self.graph, self.graph.index[start], self.graph.index[goal], order, queue, self.stats
+            )
+        self.order.extend(self.graph.path_names(order))  # Visit order of both directions
+        return self.graph.path_names(path), cost  # None and infinite cost if goal is not found
+
+    def ch(self, start, goal):
+        # Same cost as ucs (a different path only among equally short ones), but only
+        # climbs the hierarchy from both ends; builds the hierarchy on first use
+        if self.hierarchy is None:
+            self.build_hierarchy()
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path, cost = self.hierarchy.query(self.graph.index[start], self.graph.index[goal], order, self.stats)
+        self.order.extend(self.graph.path_names(order))  # Visit order of both directions
+        return self.graph.path_names(path), cost  # None and infinite cost if goal is not found
+
+    def search(self, output=None):
         # Reset visit order for each search
         self.order = []
 
@@ -132,39 +200,45 @@ class TravelEthiopia:
             title = "Uniform Cost Search"
             result, cost = self.ucs(self.start, self.goal)
             print(f"Path: {result}, Total Cost: {cost}")
+        elif self.strategy == "bibfs":
+            title = "Bidirectional Breadth-First Search"
+            result = self.bibfs(self.start, self.goal)
+        elif self.strategy == "biucs":
+            title = "Bidirectional Uniform Cost Search"
+            result, cost = self.biucs(self.start, self.goal)
+            print(f"Path: {result}, Total Cost: {cost}")
+        elif self.strategy == "ch":
+            title = "Contraction Hierarchy Search"
+            result, cost = self.ch(self.start, self.goal)
+            print(f"Path: {result}, Total Cost: {cost}")
         else:
-            raise ValueError("Invalid strategy. Use 'dfs' or 'bfs'.")
+            raise ValueError("Invalid strategy. Use 'dfs', 'bfs', 'ucs', 'bibfs', 'biucs' or 'ch'.")
         print(result)
 
         # Visualize the search process
-        pos = nx.spring_layout(self.G,  seed=42)
-        self.visualize_search(pos, title)
+        from graph_layout import graph_layout
+
+        pos = graph_layout(self.G, seed=42, coordinates=self.coordinates)  # Cached per road network
+        self.visualize_search(pos, title, output)
 
 
         return result
 
-    def visualize_search(self, pos, title):
-        plt.figure(figsize=(10, 8))
-        for i, node in enumerate(self.order, start=1):
-            plt.clf()
-            plt.title(f"{title} - Step {i}")
-            # Highlight the current node (red for current, green for others)
-            nx.draw(
-                self.G,
-                pos,
-                with_labels=True,
-                node_color=['r' if (n == node) else 'g' if n == self.goal else 'b' for n in self.G.nodes],
-                node_size=100,
-                font_size=10
-            )
-            plt.draw()
-            plt.pause(0.15)  # Pause to show each step for 1 second
+    def visualize_search(self, pos, title, output=None, fps=None):
+        # Replay the visit order (red for current, green for the goal) until the goal.
+        # Bidirectional searches expand the goal early from the backward side, so they
+        # are replayed in full. With output (.gif, .mp4, ...) the animation is saved
+        # there instead of shown.
+        from search_animation import animate_search
 
-            # Stop visualization if the goal is reached
-            # print(node, self.goal)
-            if node == self.goal:
-                break
-        plt.show()
+        bidirectional = self.strategy in ("bibfs", "biucs", "ch")
+        animation = animate_search(
+            self.G, pos, self.order, title, goals={self.goal}, stop_at=() if bidirectional else {self.goal},
+            interval=150, output=output, fps=fps
+        )
+        if output is None:
+            import matplotlib.pyplot as plt
+            plt.show()
 
 
 
@@ -268,5 +342,6 @@ roads = {
     'Nairobi': [('Moyale', 22)],
 }
 
-ethiopia = TravelEthiopia(cities, roads, 'Addis Ababa', 'Nairobi', 'ucs')
-ethiopia.search()
+if __name__ == '__main__':
+    ethiopia = TravelEthiopia(cities, roads, 'Addis Ababa', 'Nairobi', 'ucs')
+    ethiopia.search()
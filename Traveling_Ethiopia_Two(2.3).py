@@ -1,47 +1,111 @@
 from random import random
 import time
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import deque
-import heapq
+
+import graph_search
+from distance_matrix import DistanceMatrix, repair_cached
+from road_graph import RoadGraph
+from search_stats import measure
+from tour_planning import optimal_goal_tour
 
 class TravelEthiopia:
-    def __init__(self, cities, roads, start=None, goals=None, strategy=None):
+    def __init__(self, cities, roads, start=None, goals=None, strategy=None, track_stats=False, coordinates=None):
         self.cities = cities
         self.roads = roads
         self.start = start
         self.goals = set(goals) if goals else set()
         self.order = []  # Stores the order of visited nodes for visualization
+        self.track_stats = track_stats  # True (or 'memory') to keep a SearchStats of each search
+        self.stats = None
+        self.coordinates = coordinates  # Optional fixed (x, y) drawing position per city, e.g. (longitude, latitude)
+
+    @property
+    def roads(self):
+        # A copy of the roads given, kept in step with set_road_length/close_road/
+        # reopen_road. Treat it as read-only: edits to it (or to the dict that was
+        # assigned) are not seen by the searches; assign new roads instead.
+        return self._roads
+
+    @roads.setter
+    def roads(self, roads):
+        # Integer-indexed copy of the road network used by the search engines.
+        # Assigning new roads rebuilds it, which also drops its cached distance matrices.
+        self._roads = {city: list(neighbors) for city, neighbors in roads.items()}
+        self._G = None  # Drawing graph, see G
+        self.graph = RoadGraph.from_roads(roads, self.cities)
+
+    @property
+    def G(self):
+        # NetworkX copy of the roads for drawing. Built on first use, so callers
+        # that only want paths never import networkx.
+        if self._G is None:
+            import networkx as nx
+            self._G = nx.Graph()
+            for city in self.roads:
+                for neighbor, _ in self.roads[city]:
+                    self._G.add_edge(city, neighbor)
+        return self._G
+
+    # Road condition updates edit the graph in place, mirror the change into
+    # roads and repair the cached distance matrices instead of dropping them.
+    # both_ways also updates the road back, if there is one.
+    def set_road_length(self, city, neighbor, length, both_ways=True):
+        change = lambda u, v: self.graph.set_weight(u, v, length)
+        self._update_road(change, self.graph.has_road, city, neighbor, both_ways)
 
-        # Build the graph for visualization
-        self.G = nx.Graph()
-        for city in roads:
-            for neighbor, _ in roads[city]:
-                self.G.add_edge(city, neighbor)
+    def close_road(self, city, neighbor, both_ways=True):
+        self._update_road(self.graph.close, self.graph.has_road, city, neighbor, both_ways)
 
-    def ucs(self, start, goal):
-        visited = set()
-        priority_queue = [(0, start, [start])]  # Priority queue stores (cost, current city, path)
+    def reopen_road(self, city, neighbor, both_ways=True):
+        is_closed = lambda u, v: (u, v) in self.graph.closed
+        self._update_road(self.graph.reopen, is_closed, city, neighbor, both_ways)
 
-        while priority_queue:
-            cost, city, path = heapq.heappop(priority_queue)
+    def _update_road(self, change, applies, city, neighbor, both_ways):
+        u, v = self.graph.index[city], self.graph.index[neighbor]
+        roads = [(u, v)]
+        if both_ways and applies(v, u):
+            roads.append((v, u))
+        names = self.graph.names
+        for a, b in roads:
+            change(a, b)
+            repair_cached(self.graph, a, b)
+            self._roads[names[a]] = [(names[c], length) for c, length in self.graph.neighbors(a)]
+        self._G = None
 
-            if city not in visited:
-                visited.add(city)
-                self.order.append(city)  # Add to visit order for visualization
+    def distance_matrix(self, cities):
+        # Distances between the given cities, built once per road network and then reused
+        return DistanceMatrix.for_graph(self.graph, [self.graph.index[city] for city in cities], stats=self.stats)
 
-                # Goal check
-                if city == goal:
-                    return path, cost
+    def ucs(self, start, goal, queue='heap'):
+        # queue: 'heap', 'indexed' (decrease-key heap) or 'bucket' (Dial, integer weights)
+        order = []
+        with measure(self.track_stats) as self.stats:
+            path, cost = graph_search.ucs(
+                self.graph, self.graph.index[start], self.graph.index[goal], order, queue, self.stats
+            )
+        self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+        return self.graph.path_names(path), cost  # None and infinite cost if goal is not found
 
-                # Add neighbors to the priority queue
-                for neighbor, travel_cost in self.roads.get(city, []):
-                    if neighbor not in visited:
-                        heapq.heappush(priority_queue, (cost + travel_cost, neighbor, path + [neighbor]))
+    def multi_goal_ucs(self, method='matrix'):
+        # method='matrix' reads every leg from the cached distance matrix;
+        # method='nearest' runs one partial UCS per leg that stops at the closest goal;
+        # method='exact' returns the optimal visiting order (Held-Karp) instead of the greedy one
+        with measure(self.track_stats) as self.stats:
+            return self._multi_goal_tour(method)
 
-        return None, float('inf')  # Return None and infinite cost if goal is not found
+    def _multi_goal_tour(self, method):
+        if method not in ('matrix', 'nearest', 'exact'):
+            raise ValueError("Invalid method. Use 'matrix', 'nearest' or 'exact'.")
+        index = self.graph.index
+        if method != 'nearest':
+            matrix = self.distance_matrix([self.start, *self.goals])
+        if method == 'exact':
+            path, cost = optimal_goal_tour(matrix, index[self.start], [index[goal] for goal in self.goals])
+            if path is None:
+                raise ValueError("No path exists to remaining goals.")
+            path = self.graph.path_names(path)
+            self.order.extend(path)  # Record the route for visualization
+            return path, cost
 
-    def multi_goal_ucs(self):
         current_city = self.start
         remaining_goals = set(self.goals)
         total_path = []
@@ -49,16 +113,26 @@ class TravelEthiopia:
 
         while remaining_goals:
             # Find the closest goal state from the current city
-            closest_goal = None
-            min_cost = float('inf')
-            best_path = None
-
-            for goal in remaining_goals:
-                path, cost = self.ucs(current_city, goal)
-                if cost < min_cost:
-                    min_cost = cost
-                    closest_goal = goal
-                    best_path = path
+            if method == 'nearest':
+                order = []
+                goal_id, min_cost, path = graph_search.nearest_target(
+                    self.graph, index[current_city], [index[goal] for goal in remaining_goals], order,
+                    stats=self.stats
+                )
+                self.order.extend(self.graph.path_names(order))  # Visit order for visualization
+                closest_goal = self.graph.names[goal_id] if goal_id is not None else None
+                best_path = self.graph.path_names(path)
+            else:
+                closest_goal = None
+                min_cost = float('inf')
+                for goal in remaining_goals:
+                    cost = matrix.distance(index[current_city], index[goal])
+                    if cost < min_cost:
+                        min_cost = cost
+                        closest_goal = goal
+                if closest_goal is not None:
+                    best_path = self.graph.path_names(matrix.path(index[current_city], index[closest_goal]))
+                    self.order.extend(best_path)  # Record the leg for visualization
 
             if closest_goal is None:
                 raise ValueError("No path exists to remaining goals.")
@@ -71,29 +145,20 @@ class TravelEthiopia:
 
         return total_path, total_cost
 
-    def visualize_search(self, pos, title):
-        plt.figure(figsize=(10, 8))
-        for i, node in enumerate(self.order, start=1):
-            plt.clf()
-            plt.title(f"{title} - Step {i}")
-            # Highlight the current node (red for current, green for others)
-            nx.draw(
-                self.G,
-                pos,
-                with_labels=True,
-                node_color=['r' if n == node else 'g' if n in self.goals else 'b' for n in self.G.nodes],
-                node_size=100,
-                font_size=10
-            )
-            plt.draw()
-            plt.pause(0.5)  # Pause to show each step for 2 seconds
+    def visualize_search(self, pos, title, output=None, fps=None):
+        # Replay the visit order (red for current, green for goals) until a goal is reached.
+        # With output (.gif, .mp4, ...) the animation is saved there instead of shown.
+        from search_animation import animate_search
 
-            # Stop visualization if the goal is reached
-            if node in self.goals:
-                break
-        plt.show()
+        animation = animate_search(
+            self.G, pos, self.order, title, goals=self.goals, stop_at=self.goals, interval=500,
+            output=output, fps=fps
+        )
+        if output is None:
+            import matplotlib.pyplot as plt
+            plt.show()
 
-    def search(self):
+    def search(self, output=None):
         # Reset visit order for each search
         self.order = []
 
@@ -103,8 +168,10 @@ class TravelEthiopia:
         print(f"Total Path: {total_path}, Total Cost: {total_cost}")
 
         # Visualize the search process
-        pos = nx.spring_layout(self.G, seed=42)
-        self.visualize_search(pos, title)
+        from graph_layout import graph_layout
+
+        pos = graph_layout(self.G, seed=42, coordinates=self.coordinates)  # Cached per road network
+        self.visualize_search(pos, title, output)
 
         return total_path, total_cost
 
@@ -211,6 +278,7 @@ roads = {
 
 goals = ["Axum", "Gondar", "Lalibela", "Babile", "Jimma", "Bale", "Sof Oumer", "Arba Minch"]
 
-travel = TravelEthiopia(cities, roads, start="Addis Ababa", goals=goals)
-path, cost = travel.search()
-print(f"Final Path: {path}, Total Cost: {cost}")
+if __name__ == '__main__':
+    travel = TravelEthiopia(cities, roads, start="Addis Ababa", goals=goals)
+    path, cost = travel.search()
+    print(f"Final Path: {path}, Total Cost: {cost}")
@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+from graph_search import STRATEGIES, route
+from road_graph import RoadGraph
+
+# Batches smaller than this are answered in the calling process
+PARALLEL_MIN_QUERIES = 2000
+
+
+def route_batch(roads, queries, cities=(), workers=None, queue='heap', chunksize=512):
+    """Answers many (start, goal, strategy) queries on one road network.
+
+    ``roads`` is a roads dict (either layout) or a RoadGraph; it is built once
+    for the whole batch. Strategies are those of graph_search.route, plus
+    'bfs_weighted' as an alias for 'ucs'. Results come back in input order as
+    (path_names, cost), or (None, None) when a city is unknown or unreachable.
+
+    With more than one worker (None: one per CPU) the queries are spread over a
+    process pool in chunks of ``chunksize``. The CSR arrays are placed in shared
+    memory once and every worker searches them in place.
+    """
+    graph = roads if isinstance(roads, RoadGraph) else RoadGraph.from_roads(roads, cities)
+    index = graph.index
+
+    # Translate names up front; unknown cities are answered without a search
+    results = [(None, None)] * len(queries)
+    tasks = []
+    positions = []
+    for position, (start, goal, strategy) in enumerate(queries):
+        if strategy == 'bfs_weighted':
+            strategy = 'ucs'
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid strategy {strategy!r} in query {position}.")
+        if start in index and goal in index:
+            tasks.append((index[start], index[goal], strategy))
+            positions.append(position)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) < PARALLEL_MIN_QUERIES:
+        answers = (route(graph, start, goal, strategy, queue=queue) for start, goal, strategy in tasks)
+    else:
+        answers = _route_in_pool(graph, tasks, workers, queue, chunksize)
+
+    for position, (path, cost) in zip(positions, answers):
+        results[position] = (graph.path_names(path), cost)
+    return results
+
+
+def _route_in_pool(graph, tasks, workers, queue, chunksize):
+    memory = shared_memory.SharedMemory(create=True, size=max(graph.nbytes(), 1))
+    try:
+        graph.copy_into(memory.buf)
+        layout = (memory.name, graph.names, graph.num_edges, graph.weight_code)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_graph, initargs=layout) as executor:
+            chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+            answers = []
+            for chunk_answers in executor.map(_route_chunk, chunks, [queue] * len(chunks)):
+                answers.extend(chunk_answers)
+        return answers
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+# State of a pool worker: the attached block (kept open while the graph views
+# it) and the RoadGraph over it
+_memory = None
+_graph = None
+
+
+def _attach_graph(name, names, num_edges, weight_code):
+    global _memory, _graph
+    _memory = shared_memory.SharedMemory(name=name)
+    _graph = RoadGraph.from_buffer(names, _memory.buf, num_edges, weight_code)
+
+
+def _route_chunk(chunk, queue):
+    # Paths go back as id tuples; the parent turns them into names
+    answers = []
+    for start, goal, strategy in chunk:
+        path, cost = route(_graph, start, goal, strategy, queue=queue)
+        answers.append((tuple(path) if path is not None else None, cost))
+    return answers
@@ -0,0 +1,258 @@
+# Scaling benchmark of every search strategy on seeded synthetic networks:
+#
+#     python benchmark.py --sizes 1000 10000 100000 --output results.json
+#     python benchmark.py --compare old.json new.json
+#
+# Each strategy runs through the entry point the scripts use (uninformed_path_finder,
+# TravelEthiopia, AStarSearchVisualizer, MiniMaxSearch) on networks from
+# synthetic_roads. Per strategy and size the results hold the setup time, and per
+# query the search time, cities expanded and route cost (hops for BFS/DFS), plus the
+# peak memory of re-running the first query under tracemalloc. Sizes, seed and
+# queries fix every network and query, so two result files differ only where the
+# code does; --compare lists those differences.
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from search_stats import measure
+from synthetic_roads import random_game_tree, random_road_network
+
+# MiniMaxSearch keeps a visited bitmask per city, which grows with the square
+# of the city count; larger game trees are skipped
+MINIMAX_MAX_CITIES = 20_000
+
+# A run is a regression when its median search time grows by more than this factor;
+# medians under MIN_COMPARED_TIME seconds are too noisy to judge
+DEFAULT_TOLERANCE = 1.25
+MIN_COMPARED_TIME = 1e-3
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+_scripts = {}
+
+
+def _load_script(filename):
+    # The numbered scripts are not importable by name
+    if filename not in _scripts:
+        spec = importlib.util.spec_from_file_location(f'_script{len(_scripts)}', os.path.join(_HERE, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+
+class Network:
+    """One synthetic road network and game tree with their seeded queries."""
+
+    def __init__(self, size, seed, queries):
+        rng = random.Random(seed)
+        self.size = size
+        last_city = f'c{size - 1:0{len(str(size - 1))}d}'  # Name of the last city synthetic_roads makes
+        self.cities, roads, _ = random_road_network(size, seed, cost_to=last_city)
+        self.cost_roads = roads  # {'cost', 'neighbors'} layout, cost towards the last city
+        self.roads = {city: data['neighbors'] for city, data in roads.items()}
+        # No adversary roads: a dead end near the root would hide most of the tree
+        self.game = random_game_tree(size, seed, adversary=0) if size <= MINIMAX_MAX_CITIES else None
+        self.pairs = [tuple(rng.sample(self.cities, 2)) if size > 1 else (self.cities[0],) * 2 for _ in range(queries)]
+        self.goal_sets = [rng.sample(self.cities, min(4, size)) for _ in range(queries)]
+
+
+# Each strategy takes a Network and returns run(query, track) -> (cost, SearchStats),
+# query being the position in the network's query lists
+
+def _finder(strategy):
+    def prepare(network):
+        from Assignment_two import uninformed_path_finder
+        from road_graph import RoadGraph
+
+        graph = RoadGraph.from_roads(network.roads, network.cities)
+
+        def run(query, track):
+            start, goal = network.pairs[query]
+            with measure(track) as stats:
+                path, cost = uninformed_path_finder(network.cities, graph, start, goal, strategy, stats)
+            return cost, stats
+        return run
+    return prepare
+
+
+def _travel(script, method, **options):
+    def prepare(network):
+        travel = _load_script(script).TravelEthiopia(network.cities, network.roads, **options)
+        if method == 'ch':
+            travel.build_hierarchy()  # Preprocessing counts as setup
+
+        def run(query, track):
+            travel.track_stats = track
+            travel.order = []
+            result = getattr(travel, method)(*network.pairs[query])
+            path, cost = result if isinstance(result, tuple) else (result, None)
+            return cost if cost is not None else len(path) - 1, travel.stats
+        return run
+    return prepare
+
+
+def _multi_goal(network):
+    module = _load_script('Traveling_Ethiopia_Two(2.3).py')
+
+    def run(query, track):
+        # A new tour every time, so no query reuses another's distance matrix
+        travel = module.TravelEthiopia(network.cities, network.roads, network.pairs[query][0], network.goal_sets[query])
+        travel.track_stats = track
+        _, cost = travel.multi_goal_ucs()
+        return cost, travel.stats
+    return run
+
+
+def _a_star(heuristic):
+    def prepare(network):
+        from Traveling_Ethiopia_Three import AStarSearchVisualizer
+
+        visualizer = AStarSearchVisualizer(network.cost_roads)
+        graph = visualizer.road_graph
+
+        def run(query, track):
+            start, goal = network.pairs[query]
+            if heuristic == 'cost':
+                goal = network.cities[-1]  # The only goal the 'cost' column is a bound for
+            visualizer.track_stats = track
+            path = [graph.index[city] for city in visualizer.a_star_search(start, goal, heuristic=heuristic)]
+            cost = sum(min(weight for v, weight in graph.neighbors(u) if v == w) for u, w in zip(path, path[1:]))
+            return cost, visualizer.stats
+        return run
+    return prepare
+
+
+def _minimax(pruning):
+    def prepare(network):
+        if network.game is None:
+            return None
+        from Traveling_Ethiopia_Four import MiniMaxSearch
+
+        root = next(iter(network.game))
+
+        def run(query, track):
+            # A fresh search each time; a shared transposition table would answer from memory
+            search = MiniMaxSearch(network.game, track_stats=track)
+            _, value = search.get_best_path(root, pruning=pruning)
+            return value, search.stats
+        return run
+    return prepare
+
+
+STRATEGIES = {
+    'finder-bfs': _finder('bfs'),
+    'finder-dfs': _finder('dfs'),
+    'finder-ucs': _finder('bfs_weighted'),
+    'one-bfs': _travel('Traveling_Ethiopia_One.py', 'bfs'),
+    'one-dfs': _travel('Traveling_Ethiopia_One.py', 'dfs'),
+    # Tree cache off, so every query is a search rather than a lookup
+    'two-ucs': _travel('Traveling_Ethiopia_Two(2.2).py', 'ucs', tree_cache_bytes=0),
+    'two-bibfs': _travel('Traveling_Ethiopia_Two(2.2).py', 'bibfs'),
+    'two-biucs': _travel('Traveling_Ethiopia_Two(2.2).py', 'biucs'),
+    'two-ch': _travel('Traveling_Ethiopia_Two(2.2).py', 'ch'),
+    'multi-goal': _multi_goal,
+    'astar-landmarks': _a_star('landmarks'),
+    'astar-cost': _a_star('cost'),
+    'minimax': _minimax(False),
+    'alphabeta': _minimax(True),
+}
+
+
+def run_benchmark(sizes, strategies=None, seed=0, queries=5, memory=True, log=None):
+    """Runs ``strategies`` (default: all) on a network of every size; returns the results dict."""
+    results = []
+    for size in sizes:
+        network = Network(size, seed, queries)
+        for name in strategies or STRATEGIES:
+            started = time.perf_counter()
+            run = STRATEGIES[name](network)
+            setup_time = time.perf_counter() - started
+            entry = {'strategy': name, 'size': size}
+            if run is None:
+                entry['skipped'] = f'more than {MINIMAX_MAX_CITIES} cities'
+                results.append(entry)
+                continue
+            runs = [run(query, True) for query in range(queries)]
+            times = [stats.wall_time for _, stats in runs]
+            entry.update(
+                setup_time=setup_time,
+                times=times,
+                median_time=statistics.median(times),
+                expanded=[stats.expanded for _, stats in runs],
+                costs=[cost for cost, _ in runs],
+                peak_memory=run(0, 'memory')[1].peak_memory if memory else None,
+            )
+            results.append(entry)
+            if log is not None:
+                print(f"{name:16} {size:>9} median {entry['median_time']:.4f}s "
+                      f"expanded {statistics.median(entry['expanded']):>9.0f} setup {setup_time:.2f}s", file=log)
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'queries': queries,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(old, new, tolerance=DEFAULT_TOLERANCE):
+    """Lines describing how ``new`` results differ from ``old`` ones and whether any regressed."""
+    before = {(entry['strategy'], entry['size']): entry for entry in old['results']}
+    lines, regressed = [], False
+    for entry in new['results']:
+        key = (entry['strategy'], entry['size'])
+        previous = before.get(key)
+        if previous is None or 'skipped' in entry or 'skipped' in previous:
+            continue
+        ratio = entry['median_time'] / previous['median_time'] if previous['median_time'] else float('inf')
+        notes = []
+        if ratio > tolerance and entry['median_time'] >= MIN_COMPARED_TIME:
+            notes.append('SLOWER')
+            regressed = True
+        if entry['expanded'] != previous['expanded']:
+            notes.append('expanded changed')
+        if entry['costs'] != previous['costs']:
+            notes.append('COSTS CHANGED')
+            regressed = True
+        lines.append(f'{key[0]:16} {key[1]:>9} time x{ratio:.2f} {" ".join(notes)}'.rstrip())
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling benchmark of every search strategy.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='city counts to benchmark')
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), help='strategies to run (default: all)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=5, help='queries per strategy and size')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run for peak memory')
+    parser.add_argument('--output', help='JSON file to write (default: standard output)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files and exit')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            lines, regressed = compare(json.load(old_file), json.load(new_file), args.tolerance)
+        print('\n'.join(lines))
+        return 1 if regressed else 0
+
+    results = run_benchmark(args.sizes, args.strategies, args.seed, args.queries, not args.no_memory, sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
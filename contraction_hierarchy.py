@@ -0,0 +1,270 @@
+from array import array
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+
+class ContractionHierarchy:
+    """Contraction hierarchy over a RoadGraph for fast point-to-point shortest paths.
+
+    Cities are contracted one by one (fewest added shortcuts first). Each
+    contraction adds a shortcut u -> w for every u -> v -> w route that has no
+    equally short detour around v. A query then only climbs: UCS from the start
+    over roads to higher-ranked cities, and backwards from the goal the same way,
+    meeting at the top. Shortcuts remember the city they skip, so the result
+    unpacks into the original roads.
+
+    ``up`` and ``down`` are CSR tuples (offsets, targets, weights, middles):
+    ``up`` holds the roads from each city to higher-ranked ones, ``down`` the
+    roads into each city from higher-ranked ones (stored at their head). A
+    middle of -1 marks an original road.
+    """
+
+    def __init__(self, names, rank, up, down, fingerprint=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.rank = rank
+        self.up = up
+        self.down = down
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, witness_limit=500):
+        """Contracts every city of ``graph``.
+
+        ``witness_limit`` caps the cities settled per detour search; a capped
+        search only adds shortcuts that were not needed, never loses one.
+        """
+        n = len(graph)
+        # Remaining roads between uncontracted cities: neighbour -> (length, middle)
+        outgoing = [{} for _ in range(n)]
+        incoming = [{} for _ in range(n)]
+        for u in range(n):
+            for v, weight in graph.neighbors(u):
+                if u != v and weight < outgoing[u].get(v, (INF,))[0]:
+                    outgoing[u][v] = incoming[v][u] = (weight, -1)
+
+        def shortcuts(v):
+            needed = []
+            for u, (first, _) in incoming[v].items():
+                lengths = {w: first + second for w, (second, _) in outgoing[v].items() if w != u}
+                if not lengths:
+                    continue
+                detours = _detour_lengths(outgoing, u, v, lengths, witness_limit)
+                needed.extend((u, w, length) for w, length in lengths.items() if detours.get(w, INF) > length)
+            return needed
+
+        def priority(v):
+            # Edge difference plus the number of neighbours already contracted
+            return len(shortcuts(v)) - len(incoming[v]) - len(outgoing[v]) + contracted_neighbors[v]
+
+        contracted_neighbors = [0] * n
+        rank = array('l', [0] * n)
+        queue = [(priority(v), v) for v in range(n)]
+        heapq.heapify(queue)
+        next_rank = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Lazy update: contract v only if it is still the cheapest
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+            for u, w, length in shortcuts(v):
+                if length < outgoing[u].get(w, (INF,))[0]:
+                    outgoing[u][w] = incoming[w][u] = (length, v)
+            for u in incoming[v]:
+                del outgoing[u][v]
+                contracted_neighbors[u] += 1
+            for w in outgoing[v]:
+                del incoming[w][v]
+                contracted_neighbors[w] += 1
+            rank[v] = next_rank
+            next_rank += 1
+
+        # What is left of each city's roads leads to cities contracted after it
+        return cls(
+            graph.names,
+            rank,
+            _to_csr(outgoing, graph.weight_code),
+            _to_csr(incoming, graph.weight_code),
+            graph.fingerprint(),
+        )
+
+    def save(self, path):
+        offsets, targets, weights, middles = self.up
+        down_offsets, down_targets, down_weights, down_middles = self.down
+        with open(path, 'wb') as file:
+            np.savez(
+                file,
+                names=np.array(self.names, dtype=str),
+                fingerprint=np.array(self.fingerprint or '', dtype=str),
+                rank=np.asarray(self.rank),
+                up_offsets=np.asarray(offsets), up_targets=np.asarray(targets),
+                up_weights=np.asarray(weights), up_middles=np.asarray(middles),
+                down_offsets=np.asarray(down_offsets), down_targets=np.asarray(down_targets),
+                down_weights=np.asarray(down_weights), down_middles=np.asarray(down_middles),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            def csr(side):
+                weights = data[side + '_weights']
+                return (
+                    _as_array('l', data[side + '_offsets']),
+                    _as_array('l', data[side + '_targets']),
+                    _as_array('d' if weights.dtype.kind == 'f' else 'l', weights),
+                    _as_array('l', data[side + '_middles']),
+                )
+            return cls(
+                data['names'].tolist(),
+                _as_array('l', data['rank']),
+                csr('up'),
+                csr('down'),
+                str(data['fingerprint']) or None,
+            )
+
+    def query(self, start, goal, order=None, stats=None):
+        """Shortest path between two city ids as (path, cost), or (None, inf).
+
+        The cost always equals UCS's. When several routes are equally short the
+        path may be a different one of them than UCS picks.
+        """
+        if start == goal:
+            return [start], 0
+        sides = (self.up, self.down)
+        distances = ({start: 0}, {goal: 0})
+        parents = ({start: None}, {goal: None})
+        heaps = ([(0, start)], [(0, goal)])
+        best, meet = INF, None
+
+        while heaps[0] or heaps[1]:
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0] <= heaps[1][0]) else 1
+            if stats is not None:
+                stats.pops += 1
+                stats.peak_frontier = max(stats.peak_frontier, len(heaps[0]) + len(heaps[1]))
+            cost, city = heapq.heappop(heaps[side])
+            if cost > distances[side][city]:
+                if stats is not None:
+                    stats.stale_pops += 1
+                continue  # Stale heap entry
+            if cost >= best:
+                heaps[side].clear()  # Nothing left on this side can shorten the route
+                continue
+            if order is not None:
+                order.append(city)
+            if stats is not None:
+                stats.expanded += 1
+            other = distances[1 - side].get(city)
+            if other is not None and cost + other < best:
+                best, meet = cost + other, city
+
+            offsets, targets, weights, _ = sides[side]
+            own = distances[side]
+            for i in range(offsets[city], offsets[city + 1]):
+                neighbor = targets[i]
+                new_cost = cost + weights[i]
+                if new_cost < own.get(neighbor, INF):
+                    own[neighbor] = new_cost
+                    parents[side][neighbor] = city
+                    heapq.heappush(heaps[side], (new_cost, neighbor))
+                    if stats is not None:
+                        stats.pushes += 1
+
+        if meet is None:
+            return None, INF
+        # Hierarchy roads from start up to the meeting city and down to the goal
+        climb = [meet]
+        while parents[0][climb[-1]] is not None:
+            climb.append(parents[0][climb[-1]])
+        climb.reverse()
+        city = parents[1][meet]
+        while city is not None:
+            climb.append(city)
+            city = parents[1][city]
+
+        path = [start]
+        for u, v in zip(climb, climb[1:]):
+            self._unpack(u, v, path)
+        return path, best
+
+    def route(self, start, goal, order=None, stats=None):
+        """Same as ``query`` between city names, returning (path_names, cost)."""
+        path, cost = self.query(self.index[start], self.index[goal], order, stats)
+        if path is None:
+            return None, cost
+        return [self.names[u] for u in path], cost
+
+    def _middle(self, u, v):
+        # City skipped by the hierarchy road u -> v (-1 for an original road)
+        if self.rank[v] > self.rank[u]:
+            offsets, targets, _, middles = self.up
+            city, neighbor = u, v
+        else:
+            offsets, targets, _, middles = self.down
+            city, neighbor = v, u
+        for i in range(offsets[city], offsets[city + 1]):
+            if targets[i] == neighbor:
+                return middles[i]
+        raise KeyError((u, v))
+
+    def _unpack(self, u, v, path):
+        # Appends the original roads of u -> v (without u) to path
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle(a, b)
+            if middle < 0:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+
+def _detour_lengths(outgoing, u, skipped, lengths, limit):
+    # Bounded UCS from u that avoids ``skipped``; costs of the targets it reaches
+    longest = max(lengths.values())
+    remaining = set(lengths)
+    distances = {u: 0}
+    heap = [(0, u)]
+    settled = 0
+    while heap and remaining and settled < limit:
+        cost, city = heapq.heappop(heap)
+        if cost > distances[city]:
+            continue
+        if cost > longest:
+            break
+        remaining.discard(city)
+        settled += 1
+        for neighbor, (weight, _) in outgoing[city].items():
+            if neighbor == skipped:
+                continue
+            new_cost = cost + weight
+            if new_cost < distances.get(neighbor, INF):
+                distances[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost, neighbor))
+    return distances
+
+
+def _to_csr(adjacency, weight_code):
+    offsets = array('l', [0])
+    targets = array('l')
+    weights = array(weight_code)
+    middles = array('l')
+    for roads in adjacency:
+        for neighbor in sorted(roads):
+            weight, middle = roads[neighbor]
+            targets.append(neighbor)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(targets))
+    return offsets, targets, weights, middles
+
+
+def _as_array(code, values):
+    result = array(code)
+    result.frombytes(np.ascontiguousarray(values, dtype=code).tobytes())
+    return result
@@ -0,0 +1,166 @@
+import heapq
+import weakref
+
+import numpy as np
+
+from graph_search import search_tree
+
+# Matrices already built per RoadGraph, least recently used first. A graph rebuilt
+# from new roads is a new object, so its matrices are dropped together with the
+# old graph. Beyond CACHE_BYTES per graph the least recently used ones are dropped
+# too; the newest is always kept.
+_matrices = weakref.WeakKeyDictionary()
+CACHE_BYTES = 64 << 20
+
+
+class DistanceMatrix:
+    """Shortest distances and predecessors from a set of source cities to every city.
+
+    Row ``i`` holds the search tree of ``sources[i]``: ``distances[i, v]`` is the cost
+    to city id ``v`` (inf if unreachable) and ``predecessors[i, v]`` its parent on
+    the path (-1 for the source and unreachable cities).
+    """
+
+    def __init__(self, graph, sources, strategy='ucs', order=None, stats=None, queue='heap'):
+        self.graph = graph
+        self.strategy = strategy
+        self.sources = list(dict.fromkeys(sources))
+        self.row = {source: i for i, source in enumerate(self.sources)}
+
+        shape = (len(self.sources), len(graph))
+        self.distances = np.full(shape, np.inf)
+        self.predecessors = np.full(shape, -1, dtype=np.int32)
+        for i in range(len(self.sources)):
+            self._fill_row(i, order, queue, stats)
+        self._set_cast()
+
+    def _fill_row(self, i, order=None, queue='heap', stats=None):
+        costs, came_from = search_tree(self.graph, self.sources[i], self.strategy, order, queue, stats)
+        self.distances[i] = np.inf
+        self.predecessors[i] = -1
+        self.distances[i, list(costs)] = list(costs.values())
+        children = [city for city, parent in came_from.items() if parent is not None]
+        self.predecessors[i, children] = [came_from[city] for city in children]
+
+    def _set_cast(self):
+        # Hand back plain ints for integer road lengths and hop counts
+        integral = self.strategy != 'ucs' or self.graph.weight_code != 'd'
+        self._cast = int if integral else float
+
+    @classmethod
+    def for_graph(cls, graph, sources, strategy='ucs', order=None, stats=None):
+        """Returns a cached matrix covering ``sources`` on ``graph``, building it if needed."""
+        matrices = _matrices.setdefault(graph, [])
+        wanted = set(sources)
+        for k, matrix in enumerate(matrices):
+            if matrix.strategy == strategy and wanted.issubset(matrix.row):
+                matrices.append(matrices.pop(k))
+                return matrix
+        matrix = cls(graph, sources, strategy, order, stats)
+        matrices.append(matrix)
+        total = sum(cached.nbytes() for cached in matrices)
+        while len(matrices) > 1 and total > CACHE_BYTES:
+            total -= matrices.pop(0).nbytes()
+        return matrix
+
+    def repair(self, u, v):
+        """Brings every row up to date after the roads u -> v were reweighted, closed or reopened.
+
+        Only cities whose cost changes are visited. A cheaper road lowers the
+        cost of v and is pushed on from there like in Dijkstra. A dearer or
+        closed tree road clears the subtree hanging below v, which is then
+        re-attached from its cheapest neighbours outside it. Among equally short
+        routes the repaired tree may keep a different one than a fresh search.
+        """
+        self._set_cast()
+        if self.strategy == 'dfs':
+            # Depth-first trees are not shortest-path trees; rebuild them
+            for i in range(len(self.sources)):
+                self._fill_row(i)
+            return
+        weight = self._road_length(u, v)
+        for i in range(len(self.sources)):
+            costs, parents = self.distances[i], self.predecessors[i]
+            if parents[v] == u and costs[u] + weight > costs[v]:
+                self._reattach_subtree(i, v)
+            elif costs[u] + weight < costs[v]:
+                costs[v] = costs[u] + weight
+                parents[v] = u
+                self._relax_from(i, [v])
+
+    def _road_length(self, u, v):
+        # Shortest open road u -> v (1 per road for hop counts), inf if none is open
+        lengths = [weight for neighbor, weight in self.graph.neighbors(u) if neighbor == v]
+        if not lengths:
+            return np.inf
+        return 1 if self.strategy != 'ucs' else min(lengths)
+
+    def _reattach_subtree(self, i, v):
+        costs, parents = self.distances[i], self.predecessors[i]
+        # A tree child of a city is reached by one of its roads, so the subtree
+        # is found from the roads out of it, without scanning the whole row
+        subtree = [v]
+        seen = {v}
+        for city in subtree:
+            for child, _ in self.graph.neighbors(city):
+                if child not in seen and parents[child] == city:
+                    seen.add(child)
+                    subtree.append(child)
+        costs[subtree] = np.inf
+        parents[subtree] = -1
+
+        unit = self.strategy != 'ucs'
+        backward = self.graph.reverse()
+        seeds = []
+        for city in subtree:
+            for neighbor, weight in backward.neighbors(city):
+                cost = costs[neighbor] + (1 if unit else weight)
+                if cost < costs[city]:
+                    costs[city] = cost
+                    parents[city] = neighbor
+            if np.isfinite(costs[city]):
+                seeds.append(city)
+        self._relax_from(i, seeds)
+
+    def _relax_from(self, i, seeds):
+        # Dijkstra restricted to the cities whose cost drops below the stored one
+        costs, parents = self.distances[i], self.predecessors[i]
+        unit = self.strategy != 'ucs'
+        heap = [(float(costs[city]), city) for city in seeds]
+        heapq.heapify(heap)
+        while heap:
+            cost, city = heapq.heappop(heap)
+            if cost > costs[city]:
+                continue
+            for neighbor, weight in self.graph.neighbors(city):
+                new_cost = cost + (1 if unit else weight)
+                if new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = city
+                    heapq.heappush(heap, (new_cost, neighbor))
+
+    def nbytes(self):
+        return self.distances.nbytes + self.predecessors.nbytes
+
+    def distance(self, source, target):
+        value = self.distances[self.row[source], target]
+        return self._cast(value) if np.isfinite(value) else float('inf')
+
+    def path(self, source, target):
+        """City ids from ``source`` to ``target``, or None if unreachable."""
+        row = self.row[source]
+        if not np.isfinite(self.distances[row, target]):
+            return None
+        predecessors = self.predecessors[row]
+        path = [target]
+        while target != source:
+            target = int(predecessors[target])
+            path.append(target)
+        path.reverse()
+        return path
+
+
+def repair_cached(graph, u, v):
+    """Repairs the cached matrices of ``graph`` after its roads u -> v changed."""
+    for matrix in _matrices.get(graph, ()):
+        matrix.repair(u, v)
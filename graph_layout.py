@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+
+import networkx as nx
+import numpy as np
+
+# Where computed layouts are kept between runs
+LAYOUT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'travel_ethiopia', 'layouts')
+
+# A cached layout seeds a new one when it already places this share of the cities;
+# at most RELAYOUT_CANDIDATES cached layouts are opened to find one
+RELAYOUT_MIN_SHARED = 0.9
+RELAYOUT_CANDIDATES = 3
+
+# Seed and city count of every cached layout, by fingerprint
+INDEX_NAME = 'index.json'
+
+
+def layout_fingerprint(G, seed=42):
+    """Hex digest of the cities and roads of ``G`` (not their lengths) and the layout seed."""
+    digest = hashlib.sha1(f'{G.is_directed()}\n{seed}\n'.encode())
+    digest.update('\n'.join(sorted(map(str, G.nodes))).encode())
+    if G.is_directed():
+        edges = sorted(f'{u}\n{v}' for u, v in G.edges)
+    else:
+        edges = sorted('\n'.join(sorted((str(u), str(v)))) for u, v in G.edges)
+    digest.update('\n\n'.join(edges).encode())
+    return digest.hexdigest()
+
+
+def graph_layout(G, seed=42, coordinates=None, directory=LAYOUT_DIR, iterations=50, relayout_iterations=10):
+    """Node positions for drawing ``G``, computed once per graph and reused from disk.
+
+    ``coordinates`` maps cities to fixed (x, y) positions, e.g. (longitude,
+    latitude). When it covers every city it is used as is; otherwise only the
+    remaining cities are placed by the spring layout around the fixed ones.
+
+    Without coordinates the spring layout is looked up under the graph's
+    fingerprint in ``directory`` and memory-mapped from there. On a miss, a
+    cached layout of the same seed that already places nearly all cities (a
+    few roads or cities added or removed) seeds a short re-layout; only a new
+    graph gets the full ``iterations``. Candidates are picked by size from a
+    small index, so a miss opens at most RELAYOUT_CANDIDATES cached files.
+    ``directory=None`` turns the cache off.
+    """
+    if coordinates is not None:
+        fixed = {node: coordinates[node] for node in G if node in coordinates}
+        if len(fixed) == len(G):
+            return fixed
+        return nx.spring_layout(G, pos=fixed or None, fixed=list(fixed) or None, iterations=iterations, seed=seed)
+
+    if directory is None:
+        return nx.spring_layout(G, iterations=iterations, seed=seed)
+
+    fingerprint = layout_fingerprint(G, seed)
+    path = os.path.join(directory, fingerprint + '.npy')
+    if os.path.exists(path):
+        return _read_layout(G, path)
+
+    old = _closest_layout(G, directory, seed)
+    if old is not None:
+        pos = nx.spring_layout(G, pos=_place_new_nodes(G, old), iterations=relayout_iterations, seed=seed)
+    else:
+        pos = nx.spring_layout(G, iterations=iterations, seed=seed)
+    _write_layout(pos, directory, path)
+    _add_to_index(directory, fingerprint, seed, len(pos))
+    return pos
+
+
+def _read_layout(G, path, mmap_mode='r'):
+    # Rows are (name, position); positions stay views into the mapped file
+    table = np.load(path, mmap_mode=mmap_mode)
+    nodes = {str(node): node for node in G}
+    positions = table['position']
+    return {nodes[name]: positions[i] for i, name in enumerate(table['name'].tolist()) if name in nodes}
+
+
+def _write_layout(pos, directory, path):
+    os.makedirs(directory, exist_ok=True)
+    names = [str(node) for node in pos]
+    width = max(map(len, names), default=1)
+    table = np.empty(len(names), dtype=[('name', f'U{width}'), ('position', 'f8', 2)])
+    table['name'] = names
+    table['position'] = np.array(list(pos.values())).reshape(-1, 2)
+    # Written aside and renamed, so a concurrent reader never maps half a file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        np.save(file, table)
+    os.replace(temporary, path)
+
+
+def _closest_layout(G, directory, seed):
+    # Cached layout of the same seed that places nearly all cities of G. Only
+    # layouts big enough to do so are candidates, closest in size first; each
+    # one tried is memory-mapped and checked against G's cities.
+    shared = RELAYOUT_MIN_SHARED * len(G)
+    candidates = sorted(
+        (abs(entry['cities'] - len(G)), fingerprint)
+        for fingerprint, entry in _read_index(directory).items()
+        if entry['seed'] == str(seed) and entry['cities'] >= shared
+    )
+    for _, fingerprint in candidates[:RELAYOUT_CANDIDATES]:
+        try:
+            pos = _read_layout(G, os.path.join(directory, fingerprint + '.npy'))
+        except (OSError, ValueError):
+            continue  # Removed or unreadable
+        if len(pos) >= shared:
+            return pos
+    return None
+
+
+def _read_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_NAME)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _add_to_index(directory, fingerprint, seed, cities):
+    # Read, update and renamed into place; a concurrent writer may drop an entry,
+    # which only costs that layout its use as a re-layout seed
+    index = _read_index(directory)
+    index[fingerprint] = {'seed': str(seed), 'cities': cities}
+    path = os.path.join(directory, INDEX_NAME)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(index, file)
+    os.replace(temporary, path)
+
+
+def _place_new_nodes(G, old):
+    # Starts each unplaced city at the mean of its placed neighbours (or the centre)
+    pos = {node: np.asarray(old[node], dtype=float) for node in G if node in old}
+    for node in G:
+        if node not in pos:
+            placed = [pos[neighbor] for neighbor in nx.all_neighbors(G, node) if neighbor in pos]
+            pos[node] = np.mean(placed, axis=0) if placed else np.zeros(2)
+    return pos
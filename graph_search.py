@@ -0,0 +1,365 @@
+from collections import deque
+
+from priority_queues import make_queue
+
+INF = float('inf')
+
+
+# Search engines over a RoadGraph. Cities are integer ids; callers translate
+# names with graph.index / graph.path_names. When an ``order`` list is given,
+# every expanded city id is appended to it (used for visualization). When a
+# SearchStats is given (see search_stats.measure), frontier work is counted in it.
+
+def bfs(graph, start, goal, order=None, stats=None):
+    came_from = breadth_first_tree(graph, start, goal, order, stats)
+    return reconstruct_path(came_from, goal) if goal in came_from else None
+
+
+def dfs(graph, start, goal, order=None, stats=None):
+    came_from = depth_first_tree(graph, start, goal, order, stats)
+    return reconstruct_path(came_from, goal) if goal in came_from else None
+
+
+def ucs(graph, start, goal, order=None, queue='heap', stats=None):
+    # queue selects the frontier backend from priority_queues ('heap', 'indexed', 'bucket')
+    distances, came_from, reached = dijkstra(graph, start, (goal,), order, queue, stats)
+    if reached is None:
+        return None, INF
+    return reconstruct_path(came_from, goal), distances[goal]
+
+
+def nearest_target(graph, start, targets, order=None, queue='heap', stats=None):
+    """One Dijkstra run that stops at the first city of ``targets`` to be settled.
+
+    Returns (target, cost, path) for the closest target, or (None, INF, None).
+    """
+    distances, came_from, target = dijkstra(graph, start, set(targets), order, queue, stats)
+    if target is None:
+        return None, INF, None
+    return target, distances[target], reconstruct_path(came_from, target)
+
+
+# The *_tree traversals and dijkstra return predecessor maps (and distances for
+# dijkstra). They stop as soon as ``goal`` (any of ``targets`` for dijkstra) is
+# expanded, or cover everything reachable from ``start`` otherwise. On early exit
+# only the entry of the city they stopped at is final.
+
+def breadth_first_tree(graph, start, goal=None, order=None, stats=None):
+    offsets, targets = graph.offsets, graph.targets
+    came_from = {start: None}  # Doubles as the visited set
+    queue = deque([start])
+    if stats is not None:
+        stats.pushes += 1
+
+    while queue:
+        city = queue.popleft()
+        if stats is not None:
+            _count_expansion(stats, len(queue) + 1)
+        if order is not None:
+            order.append(city)
+        if city == goal:
+            break
+        for i in range(offsets[city], offsets[city + 1]):
+            neighbor = targets[i]
+            if neighbor not in came_from:
+                came_from[neighbor] = city
+                queue.append(neighbor)
+                if stats is not None:
+                    stats.pushes += 1
+
+    return came_from
+
+
+def depth_first_tree(graph, start, goal=None, order=None, stats=None):
+    offsets, targets = graph.offsets, graph.targets
+    came_from = {}
+    stack = [(start, None)]  # (city, city it was pushed from)
+    if stats is not None:
+        stats.pushes += 1
+
+    while stack:
+        city, parent = stack.pop()
+        if city in came_from:
+            if stats is not None:
+                _count_stale(stats)
+            continue
+        if stats is not None:
+            _count_expansion(stats, len(stack) + 1)
+        came_from[city] = parent
+        if order is not None:
+            order.append(city)
+        if city == goal:
+            break
+        # Push in reverse so the first listed neighbour is explored first
+        for i in range(offsets[city + 1] - 1, offsets[city] - 1, -1):
+            neighbor = targets[i]
+            if neighbor not in came_from:
+                stack.append((neighbor, city))
+                if stats is not None:
+                    stats.pushes += 1
+
+    return came_from
+
+
+def dijkstra(graph, start, targets=(), order=None, queue='heap', stats=None):
+    # Also returns the target it stopped at (None if it ran to exhaustion)
+    offsets, heads, weights = graph.offsets, graph.targets, graph.weights
+    frontier = make_queue(queue)
+    frontier.push(start, 0)
+    distances = {start: 0}
+    came_from = {start: None}
+    settled = set()
+    if stats is not None:
+        stats.pushes += 1
+
+    while frontier:
+        if stats is not None:
+            _count_expansion(stats, len(frontier))
+        cost, city = frontier.pop()
+        if city in settled:
+            if stats is not None:
+                _count_stale(stats)
+            continue  # Stale duplicate left behind by the lazy heap
+        settled.add(city)
+        if order is not None:
+            order.append(city)
+        if city in targets:
+            return distances, came_from, city
+        for i in range(offsets[city], offsets[city + 1]):
+            neighbor = heads[i]
+            new_cost = cost + weights[i]
+            if neighbor not in settled and new_cost < distances.get(neighbor, INF):
+                distances[neighbor] = new_cost
+                came_from[neighbor] = city
+                frontier.push(neighbor, new_cost)
+                if stats is not None:
+                    stats.pushes += 1
+
+    return distances, came_from, None
+
+
+def search_tree(graph, source, strategy='ucs', order=None, queue='heap', stats=None):
+    """Full search tree from ``source`` as (costs, came_from) dicts keyed by city id.
+
+    Costs are road lengths for 'ucs' and hop counts along the tree for 'bfs'/'dfs',
+    so a path read off the tree is exactly what a single query would return.
+    """
+    if strategy == 'ucs':
+        distances, came_from, _ = dijkstra(graph, source, (), order, queue, stats)
+        return distances, came_from
+    if strategy == 'bfs':
+        came_from = breadth_first_tree(graph, source, None, order, stats)
+    elif strategy == 'dfs':
+        came_from = depth_first_tree(graph, source, None, order, stats)
+    else:
+        raise ValueError(f"Invalid strategy {strategy!r}. Use 'bfs', 'dfs' or 'ucs'.")
+
+    # Parents are always recorded before their children
+    costs = {}
+    for city, parent in came_from.items():
+        costs[city] = 0 if parent is None else costs[parent] + 1
+    return costs, came_from
+
+
+def a_star(graph, start, goal, heuristic, order=None, queue='heap', stats=None):
+    # heuristic is indexable by city id (list/array of estimates to ``goal``)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    if heuristic[start] == INF:
+        return None, INF
+    frontier = make_queue(queue)
+    frontier.push(start, heuristic[start])
+    g_costs = {start: 0}
+    came_from = {}
+    if stats is not None:
+        stats.pushes += 1
+
+    while frontier:
+        if stats is not None:
+            _count_expansion(stats, len(frontier))
+        f_cost, city = frontier.pop()
+        if f_cost > g_costs[city] + heuristic[city]:
+            if stats is not None:
+                _count_stale(stats)
+            continue  # Stale duplicate left behind by the lazy heap
+        if order is not None:
+            order.append(city)
+        if city == goal:
+            return reconstruct_path(came_from, city), g_costs[city]
+        for i in range(offsets[city], offsets[city + 1]):
+            neighbor = targets[i]
+            tentative_g_cost = g_costs[city] + weights[i]
+            if heuristic[neighbor] == INF:
+                continue  # The heuristic proves the goal cannot be reached from here
+            if neighbor not in g_costs or tentative_g_cost < g_costs[neighbor]:
+                g_costs[neighbor] = tentative_g_cost
+                came_from[neighbor] = city
+                frontier.push(neighbor, tentative_g_cost + heuristic[neighbor])
+                if stats is not None:
+                    stats.pushes += 1
+
+    return None, INF
+
+
+def bidirectional_bfs(graph, start, goal, order=None, stats=None):
+    """Fewest-hop path found by growing BFS levels from both ends."""
+    sides = [graph, graph.reverse()]
+    came_from = [{start: None}, {goal: None}]
+    depth = [{start: 0}, {goal: 0}]
+    frontiers = [[start], [goal]]
+    best, meet = (0, start) if start == goal else (INF, None)
+    if stats is not None:
+        stats.pushes += 2
+
+    while frontiers[0] and frontiers[1] and meet is None:
+        # Expand one whole level on the side with the smaller frontier
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        offsets, targets = sides[side].offsets, sides[side].targets
+        parents, depths, other = came_from[side], depth[side], depth[1 - side]
+        next_level = []
+        for city in frontiers[side]:
+            if stats is not None:
+                _count_expansion(stats, len(frontiers[0]) + len(frontiers[1]) + len(next_level))
+            if order is not None:
+                order.append(city)
+            for i in range(offsets[city], offsets[city + 1]):
+                neighbor = targets[i]
+                if neighbor not in parents:
+                    parents[neighbor] = city
+                    depths[neighbor] = depths[city] + 1
+                    next_level.append(neighbor)
+                    if stats is not None:
+                        stats.pushes += 1
+                    # Finish the level so the shortest of its meeting points wins
+                    if neighbor in other and depths[neighbor] + other[neighbor] < best:
+                        best, meet = depths[neighbor] + other[neighbor], neighbor
+        frontiers[side] = next_level
+
+    if meet is None:
+        return None
+    return _join_paths(came_from, meet)
+
+
+def bidirectional_dijkstra(graph, start, goal, order=None, queue='heap', stats=None):
+    """Shortest path found by running UCS forwards from start and backwards from goal.
+
+    Stops once the two smallest frontier costs add up to at least the best
+    start-goal route seen so far, which is then optimal. Returns (path, cost).
+    """
+    sides = [graph, graph.reverse()]
+    distances = [{start: 0}, {goal: 0}]
+    came_from = [{start: None}, {goal: None}]
+    settled = [set(), set()]
+    frontiers = [make_queue(queue), make_queue(queue)]
+    frontiers[0].push(start, 0)
+    frontiers[1].push(goal, 0)
+    best, meet = (0, start) if start == goal else (INF, None)
+    if stats is not None:
+        stats.pushes += 2
+
+    while frontiers[0] and frontiers[1]:
+        if frontiers[0].peek() + frontiers[1].peek() >= best:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        if stats is not None:
+            _count_expansion(stats, len(frontiers[0]) + len(frontiers[1]))
+        cost, city = frontiers[side].pop()
+        if city in settled[side]:
+            if stats is not None:
+                _count_stale(stats)
+            continue  # Stale duplicate left behind by the lazy heap
+        settled[side].add(city)
+        if order is not None:
+            order.append(city)
+
+        offsets, targets, weights = sides[side].offsets, sides[side].targets, sides[side].weights
+        own, other = distances[side], distances[1 - side]
+        for i in range(offsets[city], offsets[city + 1]):
+            neighbor = targets[i]
+            new_cost = cost + weights[i]
+            if new_cost < own.get(neighbor, INF):
+                own[neighbor] = new_cost
+                came_from[side][neighbor] = city
+                frontiers[side].push(neighbor, new_cost)
+                if stats is not None:
+                    stats.pushes += 1
+            if neighbor in other and own[neighbor] + other[neighbor] < best:
+                best, meet = own[neighbor] + other[neighbor], neighbor
+
+    if meet is None:
+        return None, INF
+    return _join_paths(came_from, meet), best
+
+
+def _count_expansion(stats, frontier_size):
+    # Called once per pop with the frontier size just before it
+    stats.pops += 1
+    stats.expanded += 1
+    if frontier_size > stats.peak_frontier:
+        stats.peak_frontier = frontier_size
+
+
+def _count_stale(stats):
+    # The pop was already counted as an expansion; reclassify it
+    stats.expanded -= 1
+    stats.stale_pops += 1
+
+
+def _join_paths(came_from, meet):
+    # Forward tree up to the meeting city, then the backward tree down to the goal
+    path = reconstruct_path(came_from[0], meet)
+    city = came_from[1][meet]
+    while city is not None:
+        path.append(city)
+        city = came_from[1][city]
+    return path
+
+
+def reconstruct_path(came_from, current):
+    """Walks predecessor links back from ``current``; the start maps to None or is absent."""
+    path = [current]
+    current = came_from.get(current)
+    while current is not None:
+        path.append(current)
+        current = came_from.get(current)
+    path.reverse()
+    return path
+
+
+STRATEGIES = ('bfs', 'dfs', 'ucs', 'bibfs', 'biucs')
+
+
+def route(graph, start, goal, strategy, order=None, queue='heap', stats=None):
+    """Runs ``strategy`` between two city ids and returns (path, cost), or (None, None).
+
+    The cost is the number of hops for 'bfs'/'dfs'/'bibfs' and the road length
+    for 'ucs'/'biucs'. ``queue`` picks the frontier backend for the weighted ones.
+    """
+    if strategy == 'bfs':
+        path = bfs(graph, start, goal, order, stats)
+    elif strategy == 'dfs':
+        path = dfs(graph, start, goal, order, stats)
+    elif strategy == 'bibfs':
+        path = bidirectional_bfs(graph, start, goal, order, stats)
+    elif strategy == 'ucs':
+        path, cost = ucs(graph, start, goal, order, queue, stats)
+    elif strategy == 'biucs':
+        path, cost = bidirectional_dijkstra(graph, start, goal, order, queue, stats)
+    else:
+        raise ValueError(f"Invalid strategy {strategy!r}. Use one of {', '.join(STRATEGIES)}.")
+
+    if path is None:
+        return None, None
+    if strategy in ('bfs', 'dfs', 'bibfs'):
+        cost = len(path) - 1
+    return path, cost
+
+
+def find_path(graph, start, goal, strategy, order=None, queue='heap', stats=None):
+    """Same as ``route`` but between two city names, returning (path_names, cost).
+
+    Returns (None, None) if either city is unknown or no path exists.
+    """
+    if start not in graph.index or goal not in graph.index:
+        return None, None
+    path, cost = route(graph, graph.index[start], graph.index[goal], strategy, order, queue, stats)
+    return graph.path_names(path), cost
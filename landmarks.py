@@ -0,0 +1,99 @@
+import numpy as np
+
+from graph_search import dijkstra
+
+
+class LandmarkHeuristic:
+    """ALT heuristic: exact distances to and from a few landmark cities.
+
+    For any landmark L the triangle inequality gives two lower bounds on the
+    distance d(v, goal):  d(L, goal) - d(L, v)  and  d(v, L) - d(goal, L).
+    The largest bound over all landmarks is admissible for every goal, so A*
+    keeps its pruning for arbitrary city pairs. Storage is 2 * count * V
+    doubles; float32 would round large integer distances and could overestimate.
+    """
+
+    def __init__(self, graph, count=4, landmarks=None):
+        self.graph = graph
+        n = len(graph)
+        if landmarks is None:
+            landmarks = self._pick_landmarks(min(count, n))
+        self.landmarks = list(landmarks)
+
+        self.from_landmark = np.full((len(self.landmarks), n), np.inf)
+        self.to_landmark = np.full((len(self.landmarks), n), np.inf)
+        backward = graph.reverse()
+        for i, landmark in enumerate(self.landmarks):
+            self._fill(self.from_landmark[i], graph, landmark)
+            self._fill(self.to_landmark[i], backward, landmark)
+
+    @classmethod
+    def from_arrays(cls, graph, landmarks, from_landmark, to_landmark):
+        """Heuristic over landmark distances computed elsewhere, e.g. sent to a worker process."""
+        heuristic = cls.__new__(cls)
+        heuristic.graph = graph
+        heuristic.landmarks = list(landmarks)
+        heuristic.from_landmark = from_landmark
+        heuristic.to_landmark = to_landmark
+        return heuristic
+
+    def _pick_landmarks(self, count):
+        # Farthest-point selection: each new landmark is the reachable city
+        # farthest from all landmarks chosen so far
+        if count == 0:
+            return []
+        graph = self.graph
+        start = max(range(len(graph)), key=lambda u: graph.offsets[u + 1] - graph.offsets[u])
+        landmarks = [start]
+        closest = np.full(len(graph), np.inf)
+        while len(landmarks) < count:
+            row = np.full(len(graph), np.inf)
+            self._fill(row, graph, landmarks[-1])
+            closest = np.minimum(closest, row)
+            reachable = np.where(np.isfinite(closest), closest, -1)
+            reachable[landmarks] = -1
+            farthest = int(reachable.argmax())
+            if reachable[farthest] < 0:
+                break
+            landmarks.append(farthest)
+        return landmarks
+
+    @staticmethod
+    def _fill(row, graph, source):
+        distances, _, _ = dijkstra(graph, source)
+        row[list(distances)] = list(distances.values())
+
+    def estimates(self, goal):
+        """Lower bounds on the distance from every city id to ``goal`` (inf if unreachable).
+
+        Indexable by city id like a list; each bound is only worked out when looked
+        up, so an A* query pays O(count) per city it touches rather than O(count * V).
+        """
+        return LandmarkEstimates(self, goal)
+
+
+class LandmarkEstimates:
+    """Lazy ``LandmarkHeuristic`` bounds towards one goal, indexed by city id."""
+
+    def __init__(self, heuristic, goal):
+        self.size = len(heuristic.graph)
+        # Memoryviews of the float64 rows index to plain floats, without numpy scalars
+        self.rows = [
+            (float(from_row[goal]), memoryview(from_row), memoryview(to_row), float(to_row[goal]))
+            for from_row, to_row in zip(heuristic.from_landmark, heuristic.to_landmark)
+        ]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, city):
+        bound = 0.0
+        for from_goal, from_row, to_row, to_goal in self.rows:
+            # inf - inf (landmark unrelated to both cities) is NaN and never the maximum
+            forward = from_goal - from_row[city]
+            backward = to_row[city] - to_goal
+            if forward > bound:
+                bound = forward
+            if backward > bound:
+                bound = backward
+        return bound
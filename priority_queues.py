@@ -0,0 +1,166 @@
+import heapq
+
+
+# Frontier queues for the weighted searches in graph_search. They share one
+# interface:
+#   push(item, priority)  insert ``item``, or lower its priority if already queued
+#   pop()                 remove and return (priority, item) with the lowest priority
+#   peek()                lowest queued priority without removing it
+#   len(queue)            number of queued entries
+# LazyHeap may hand back stale duplicates; callers skip cities they already settled.
+
+class LazyHeap:
+    """Plain heapq frontier; decrease-key is a second push."""
+
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, item, priority):
+        heapq.heappush(self.heap, (priority, item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+    def peek(self):
+        return self.heap[0][0]
+
+
+class IndexedHeap:
+    """Binary heap with a position index, so every item is queued at most once."""
+
+    def __init__(self):
+        self.heap = []  # [priority, item] pairs
+        self.position = {}  # item -> index in self.heap
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def push(self, item, priority):
+        index = self.position.get(item)
+        if index is None:
+            self.heap.append([priority, item])
+            self.position[item] = len(self.heap) - 1
+            self._sift_up(len(self.heap) - 1)
+        elif priority < self.heap[index][0]:
+            self.heap[index][0] = priority
+            self._sift_up(index)
+
+    def pop(self):
+        heap = self.heap
+        last = heap.pop()
+        if not heap:
+            del self.position[last[1]]
+            return last[0], last[1]
+        top = heap[0]
+        heap[0] = last
+        self.position[last[1]] = 0
+        del self.position[top[1]]
+        self._sift_down(0)
+        return top[0], top[1]
+
+    def peek(self):
+        return self.heap[0][0]
+
+    def _sift_up(self, index):
+        heap, position = self.heap, self.position
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[index] = heap[parent]
+            position[heap[index][1]] = index
+            index = parent
+        heap[index] = entry
+        position[entry[1]] = index
+
+    def _sift_down(self, index):
+        heap, position = self.heap, self.position
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[index] = heap[child]
+            position[heap[index][1]] = index
+            index = child
+        heap[index] = entry
+        position[entry[1]] = index
+
+
+class BucketQueue:
+    """Dial's bucket queue for non-negative integer priorities.
+
+    Items live in one bucket per priority value and a cursor walks the buckets
+    upwards, so push, decrease-key and pop are O(1) apart from skipping empty
+    buckets, which is bounded by the largest edge weight in Dijkstra.
+    """
+
+    def __init__(self):
+        self.buckets = {}  # priority -> {item: None}, insertion ordered
+        self.priority = {}  # item -> current priority
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.priority)
+
+    def __contains__(self, item):
+        return item in self.priority
+
+    def push(self, item, priority):
+        if priority < 0 or priority != int(priority):
+            raise ValueError(f"BucketQueue needs non-negative integer priorities, got {priority!r}")
+        priority = int(priority)
+        old = self.priority.get(item)
+        if old is not None:
+            if priority >= old:
+                return
+            self._remove(item, old)
+        if not self.priority or priority < self.cursor:
+            self.cursor = priority
+        self.buckets.setdefault(priority, {})[item] = None
+        self.priority[item] = priority
+
+    def pop(self):
+        item = next(iter(self.buckets[self.peek()]))
+        self._remove(item, self.cursor)
+        return self.cursor, item
+
+    def peek(self):
+        if not self.priority:
+            raise IndexError("peek into an empty BucketQueue")
+        while self.cursor not in self.buckets:
+            self.cursor += 1
+        return self.cursor
+
+    def _remove(self, item, priority):
+        bucket = self.buckets[priority]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[priority]
+        del self.priority[item]
+
+
+QUEUES = {
+    'heap': LazyHeap,
+    'indexed': IndexedHeap,
+    'bucket': BucketQueue,
+}
+
+
+def make_queue(kind):
+    try:
+        return QUEUES[kind]()
+    except KeyError:
+        raise ValueError(f"Invalid queue {kind!r}. Use one of {', '.join(QUEUES)}.") from None
@@ -0,0 +1,295 @@
+from array import array
+import math
+import mmap
+import os
+import struct
+import sys
+
+from road_graph import RoadGraph
+
+# File layout, every section starting on an 8-byte boundary, all little-endian:
+#   header        HEADER below
+#   name offsets  int64 x (cities + 1) into the name bytes
+#   name bytes    UTF-8 names, sorted (the RoadGraph ids)
+#   CSR           offsets int64 x (cities + 1), targets int64 x roads,
+#                 weights int64 or float64 x roads (RoadGraph.copy_into order)
+#   columns       heuristic float64, utility float64, terminal uint8, each
+#                 x cities and only if flagged; NaN marks a missing value
+MAGIC = b'ROADNET\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqqq4s4x')  # magic, version, flags, cities, roads, name bytes, weight kind
+
+HEURISTIC = 1  # 'cost' column of the {'cost', 'neighbors'} layout
+UTILITY = 2  # 'utility' column of the {'utility', 'terminal', 'neighbors'} layout
+TERMINAL = 4  # 'terminal' column of the same
+BOOL_WEIGHTS = 8  # Roads carry flags (adversary roads), not lengths
+
+# (RoadFile attribute, dict key, flag, array typecode) of the optional columns
+COLUMNS = (
+    ('heuristic', 'cost', HEURISTIC, 'd'),
+    ('utility', 'utility', UTILITY, 'd'),
+    ('terminal', 'terminal', TERMINAL, 'B'),
+)
+
+
+class RoadReport:
+    """Problems found in a road network by ``validate_roads``.
+
+    dangling    (city, neighbor) roads to a neighbour that has no roads of its
+                own listed, usually a misspelt name that became a phantom city
+    unlisted    cities in the roads that are missing from the ``cities`` list
+    asymmetric  (city, neighbor, length, length back) for roads whose way back
+                is missing (None) or has another length
+    """
+
+    __slots__ = ('dangling', 'unlisted', 'asymmetric')
+
+    def __init__(self, dangling, unlisted, asymmetric):
+        self.dangling = dangling
+        self.unlisted = unlisted
+        self.asymmetric = asymmetric
+
+    @property
+    def ok(self):
+        return not (self.dangling or self.unlisted or self.asymmetric)
+
+    def __str__(self):
+        lines = [f'Dangling road {city} -> {neighbor}' for city, neighbor in self.dangling]
+        lines += [f'City {city} is not in the cities list' for city in self.unlisted]
+        for city, neighbor, length, back in self.asymmetric:
+            if back is None:
+                lines.append(f'Road {city} -> {neighbor} ({length}) has no way back')
+            else:
+                lines.append(f'Road {city} -> {neighbor} is {length} one way and {back} back')
+        return '\n'.join(lines) or 'No problems found'
+
+
+def validate_roads(roads, cities=()):
+    """Checks a roads dict (any layout) or a RoadGraph and returns a RoadReport.
+
+    In a RoadGraph every city has an entry, so a dangling road there is one to
+    a city without roads of its own. For flag roads (the game layout) only a
+    missing way back counts as asymmetric.
+    """
+    adjacency = _adjacency(roads)
+    flags = _bool_weights(adjacency)
+    known = set(cities)
+
+    dangling, asymmetric = [], []
+    unlisted = set()
+    for city, neighbors in adjacency.items():
+        if known and city not in known:
+            unlisted.add(city)
+        for neighbor, length in neighbors:
+            if known and neighbor not in known:
+                unlisted.add(neighbor)
+            back = [weight for other, weight in adjacency.get(neighbor, ()) if other == city]
+            if not adjacency.get(neighbor):
+                dangling.append((city, neighbor))
+            elif not back:
+                asymmetric.append((city, neighbor, length, None))
+            elif not flags and length not in back:
+                asymmetric.append((city, neighbor, length, back[0]))
+    return RoadReport(dangling, sorted(unlisted), asymmetric)
+
+
+def write_road_file(path, roads, cities=(), strict=False):
+    """Writes a roads dict (any layout) or a RoadGraph to ``path`` for ``RoadFile``.
+
+    The 'cost', 'utility' and 'terminal' entries of the dict layouts become
+    columns. Returns the RoadReport of the network; with ``strict`` a network
+    that has problems raises ValueError instead of being written.
+    """
+    report = validate_roads(roads, cities)
+    if strict and not report.ok:
+        raise ValueError(f'{path}: road network has problems:\n{report}')
+
+    graph = roads if isinstance(roads, RoadGraph) else RoadGraph.from_roads(roads, cities)
+    flags = BOOL_WEIGHTS if _bool_weights(_adjacency(roads)) else 0
+    columns = []
+    for _, key, flag, code in COLUMNS:
+        if isinstance(roads, dict) and any(isinstance(data, dict) and key in data for data in roads.values()):
+            missing = 0 if code == 'B' else math.nan
+            values = [roads.get(name) for name in graph.names]
+            values = [data.get(key) if isinstance(data, dict) else None for data in values]
+            columns.append(array(code, [missing if value is None else value for value in values]))
+            flags |= flag
+
+    encoded = [name.encode() for name in graph.names]
+    name_offsets = array('q', [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    weight_kind = b'd' if graph.weight_code == 'd' else b'q'
+    sections = [
+        name_offsets,
+        b''.join(encoded),
+        array('q', graph.offsets),
+        array('q', graph.targets),
+        array(weight_kind.decode(), graph.weights),
+        *columns,
+    ]
+
+    header = HEADER.pack(MAGIC, VERSION, flags, len(graph), graph.num_edges, name_offsets[-1], weight_kind)
+    # Written aside and renamed, so a reader never maps half a file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(header)
+        for section in sections:
+            if isinstance(section, array) and sys.byteorder != 'little':
+                section = array(section.typecode, section)
+                section.byteswap()
+            data = memoryview(section).cast('B')
+            file.write(data)
+            file.write(bytes(-len(data) % 8))
+    os.replace(temporary, path)
+    return report
+
+
+class RoadFile:
+    """A road network file mapped into memory.
+
+    Opening reads the header and the name table only; ``graph`` is a RoadGraph
+    whose CSR arrays are views into the mapping, so no road is parsed or copied
+    however large the network. The mapping is copy-on-write: in-place road
+    updates on ``graph`` stay private to this process. The optional columns
+    (``heuristic``, ``utility``, ``terminal``) are views indexed by city id, or
+    None when the file has none.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            sizes = self._check_header(path)
+        except ValueError:
+            self._map.close()
+            raise
+
+        view = memoryview(self._map)
+        sections = {}
+        position = HEADER.size
+        for name, size in sizes:
+            sections[name] = view[position:position + size]
+            position += size + -size % 8
+
+        offsets = sections['name_offsets'].cast('q')
+        text = bytes(sections['name_bytes'])
+        names = [text[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+        offsets.release()
+        self.graph = self._map_graph(names, sections['csr'], self._roads, self._weight_kind)
+        for column, _, flag, code in COLUMNS:
+            setattr(self, column, sections[column].cast(code) if self.flags & flag else None)
+        self._view = view
+
+    def _check_header(self, path):
+        # Validates the header and file size; returns the (section, size) list
+        if len(self._map) < HEADER.size:
+            raise ValueError(f'{path} is not a road network file.')
+        magic, version, self.flags, cities, self._roads, name_bytes, weight_kind = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a road network file.')
+        if version != VERSION:
+            raise ValueError(f'{path} has format version {version}, expected {VERSION}.')
+        if sys.byteorder != 'little':
+            raise ValueError('Road network files can only be mapped on little-endian machines.')
+        self._weight_kind = weight_kind.rstrip(b'\0').decode()
+
+        sizes = [
+            ('name_offsets', 8 * (cities + 1)),
+            ('name_bytes', name_bytes),
+            ('csr', 8 * (cities + 1 + 2 * self._roads)),
+        ]
+        sizes += [(column, (1 if code == 'B' else 8) * cities) for column, _, flag, code in COLUMNS if self.flags & flag]
+        if HEADER.size + sum(size + -size % 8 for _, size in sizes) > len(self._map):
+            raise ValueError(f'{path} is truncated.')
+        return sizes
+
+    @staticmethod
+    def _map_graph(names, csr, roads, weight_kind):
+        if array('l').itemsize == 8:
+            return RoadGraph.from_buffer(names, csr, roads, 'd' if weight_kind == 'd' else 'l')
+        # Native longs are narrower than the file's; copy into the usual arrays
+        cities = len(names)
+        longs = csr[:8 * (cities + 1 + roads)].cast('q')
+        offsets, targets = array('l', longs[:cities + 1]), array('l', longs[cities + 1:])
+        raw = csr[8 * (cities + 1 + roads):].cast(weight_kind)
+        return RoadGraph(names, offsets, targets, array('d' if weight_kind == 'd' else 'l', raw))
+
+    def to_roads(self):
+        """The network in the dict layout it was written from, for the classes that take roads dicts.
+
+        Cities without roads or columns of their own are left out, as they
+        were in the dict. Flag roads come back as bools.
+        """
+        graph = self.graph
+        columns = [(key, getattr(self, column)) for column, key, flag, _ in COLUMNS if self.flags & flag]
+        flags = self.flags & BOOL_WEIGHTS
+        roads = {}
+        for u, name in enumerate(graph.names):
+            neighbors = [
+                (graph.names[v], bool(weight) if flags else weight) for v, weight in graph.neighbors(u)
+            ]
+            if not columns:
+                if neighbors:
+                    roads[name] = neighbors
+                continue
+            data = {}
+            for key, values in columns:
+                value = values[u]
+                if key == 'terminal':
+                    data[key] = bool(value)
+                elif not math.isnan(value):
+                    data[key] = int(value) if value == int(value) else value
+            if neighbors or any(key != 'terminal' for key in data):
+                roads[name] = {**data, 'neighbors': neighbors}
+        return roads
+
+    def close(self):
+        # Views into the mapping must go before it can be closed
+        for column, _, _, _ in COLUMNS:
+            if getattr(self, column) is not None:
+                getattr(self, column).release()
+        graph = self.graph
+        for values in (graph.offsets, graph.targets, graph.weights):
+            if isinstance(values, memoryview):
+                values.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _adjacency(roads):
+    # city -> [(neighbor, weight), ...] for both dict layouts and a RoadGraph
+    if isinstance(roads, RoadGraph):
+        return {
+            name: [(roads.names[v], weight) for v, weight in roads.neighbors(u)]
+            for u, name in enumerate(roads.names)
+        }
+    return {city: data['neighbors'] if isinstance(data, dict) else data for city, data in roads.items()}
+
+
+def _bool_weights(adjacency):
+    weights = [weight for neighbors in adjacency.values() for _, weight in neighbors]
+    return bool(weights) and all(isinstance(weight, bool) for weight in weights)
+
+
+if __name__ == '__main__':
+    import argparse
+    import runpy
+
+    parser = argparse.ArgumentParser(description='Converts the roads dict of a script to a road network file.')
+    parser.add_argument('script', help='Python file defining the roads (and optionally cities)')
+    parser.add_argument('output', help='road network file to write')
+    parser.add_argument('--roads', default='roads', help='name of the roads dict in the script')
+    parser.add_argument('--cities', default='cities', help='name of the cities list, if any')
+    parser.add_argument('--strict', action='store_true', help='refuse to write a network with problems')
+    args = parser.parse_args()
+
+    namespace = runpy.run_path(args.script)
+    report = write_road_file(args.output, namespace[args.roads], namespace.get(args.cities, ()), args.strict)
+    print(report)
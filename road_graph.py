@@ -0,0 +1,219 @@
+from array import array
+import hashlib
+
+
+class RoadGraph:
+    """Compact road graph: city names interned to integer ids, adjacency in CSR arrays.
+
+    The neighbours of city ``u`` are ``targets[offsets[u]:offsets[u + 1]]`` with the
+    matching road lengths in ``weights``. Edges are stored exactly as listed in the
+    ``roads`` dict (direction and neighbour order are preserved).
+
+    Roads can be reweighted, closed and reopened in place. The cached reverse
+    graph is edited along with it; caches of search results must be repaired by
+    their owners (see DistanceMatrix.repair).
+    """
+
+    def __init__(self, names, offsets, targets, weights):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        # 'l' or 'd'; the arrays may also be memoryviews over shared or mapped memory
+        self.weight_code = getattr(weights, 'typecode', None) or weights.format
+        self.closed = {}  # (u, v) -> [(position in u's list, weight), ...] of closed roads
+        self._reverse = None
+
+    @classmethod
+    def from_roads(cls, roads, cities=()):
+        # Accept both {'city': [(neighbor, distance), ...]} and
+        # {'city': {'neighbors': [(neighbor, distance), ...], ...}} layouts
+        adjacency = {
+            city: data['neighbors'] if isinstance(data, dict) else data
+            for city, data in roads.items()
+        }
+
+        # Ids follow name order so that integer ties in the priority queues break
+        # the same way the old (cost, city_name, ...) tuples did
+        names = set(cities) | set(adjacency)
+        for neighbors in adjacency.values():
+            names.update(neighbor for neighbor, _ in neighbors)
+        names = sorted(names)
+        index = {name: i for i, name in enumerate(names)}
+
+        offsets = array('l', [0])
+        targets = array('l')
+        raw_weights = []
+        for name in names:
+            for neighbor, distance in adjacency.get(name, ()):
+                targets.append(index[neighbor])
+                raw_weights.append(distance)
+            offsets.append(len(targets))
+
+        # Keep integer road lengths integral; fall back to doubles otherwise
+        if all(isinstance(w, int) for w in raw_weights):
+            weights = array('l', raw_weights)
+        else:
+            weights = array('d', raw_weights)
+        return cls(names, offsets, targets, weights)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def neighbors(self, u):
+        """Yields (neighbor_id, weight) pairs for city id ``u``."""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[lo:hi], self.weights[lo:hi])
+
+    def reverse(self):
+        """The same cities with every road flipped, built once and cached."""
+        if self._reverse is None:
+            n = len(self.names)
+            counts = [0] * (n + 1)
+            for v in self.targets:
+                counts[v + 1] += 1
+            offsets = array('l', counts)
+            for u in range(n):
+                offsets[u + 1] += offsets[u]
+            targets = array('l', bytes(self.targets.itemsize * len(self.targets)))
+            weights = array(self.weight_code, bytes(self.weights.itemsize * len(self.weights)))
+            fill = array('l', offsets)
+            for u in range(n):
+                for i in range(self.offsets[u], self.offsets[u + 1]):
+                    slot = fill[self.targets[i]]
+                    targets[slot] = u
+                    weights[slot] = self.weights[i]
+                    fill[self.targets[i]] = slot + 1
+            self._reverse = RoadGraph(self.names, offsets, targets, weights)
+            self._reverse._reverse = self
+        return self._reverse
+
+    @classmethod
+    def from_buffer(cls, names, buffer, num_edges, weight_code='l'):
+        """RoadGraph viewing offsets, targets and weights laid out back to back in ``buffer``.
+
+        Nothing is copied, so graphs in shared memory or a mapped file can be
+        searched in place. The layout is the one written by ``copy_into``.
+        """
+        view = memoryview(buffer).cast('B')
+        sizes = [
+            ('l', len(names) + 1),
+            ('l', num_edges),
+            (weight_code, num_edges),
+        ]
+        arrays = []
+        position = 0
+        for code, count in sizes:
+            size = array(code).itemsize * count
+            arrays.append(view[position:position + size].cast(code))
+            position += size
+        return cls(names, *arrays)
+
+    def copy_into(self, buffer):
+        """Writes the CSR arrays into ``buffer`` (at least ``nbytes()`` long) for ``from_buffer``."""
+        view = memoryview(buffer).cast('B')
+        position = 0
+        for values in (self.offsets, self.targets, self.weights):
+            data = memoryview(values).cast('B')
+            view[position:position + len(data)] = data
+            position += len(data)
+        view.release()
+
+    def fingerprint(self):
+        """Hex digest of the cities and roads, for checking saved data against this graph."""
+        digest = hashlib.sha1('\n'.join(self.names).encode())
+        digest.update(self.weight_code.encode())
+        for values in (self.offsets, self.targets, self.weights):
+            digest.update(memoryview(values).cast('B'))
+        return digest.hexdigest()
+
+    def has_road(self, u, v):
+        return bool(self._slots(u, v))
+
+    def set_weight(self, u, v, weight):
+        """Changes the length of the open road(s) from city id ``u`` to ``v``."""
+        if not self.has_road(u, v):
+            raise ValueError(f"There is no open road from {self.names[u]} to {self.names[v]}.")
+        if self.weight_code != 'd' and weight != int(weight):
+            # A fractional length turns the integer weights into doubles
+            for graph, _, _ in self._sides(u, v):
+                graph._make_resizable()
+                graph.weights = array('d', graph.weights)
+                graph.weight_code = 'd'
+        for graph, a, b in self._sides(u, v):
+            value = weight if graph.weight_code == 'd' else int(weight)
+            for i in graph._slots(a, b):
+                graph.weights[i] = value
+
+    def close(self, u, v):
+        """Takes the road(s) from ``u`` to ``v`` out of the graph until ``reopen``."""
+        if not self.has_road(u, v):
+            raise ValueError(f"There is no open road from {self.names[u]} to {self.names[v]}.")
+        for graph, a, b in self._sides(u, v):
+            graph._make_resizable()
+            lo = graph.offsets[a]
+            slots = graph._slots(a, b)
+            graph.closed.setdefault((a, b), []).extend((i - lo, graph.weights[i]) for i in slots)
+            for i in reversed(slots):
+                del graph.targets[i]
+                del graph.weights[i]
+            graph._shift_offsets(a, -len(slots))
+
+    def reopen(self, u, v):
+        """Puts closed road(s) back at their old place in ``u``'s neighbour list."""
+        if (u, v) not in self.closed:
+            raise ValueError(f"There is no closed road from {self.names[u]} to {self.names[v]}.")
+        roads = self.closed[(u, v)]
+        for graph, a, b in self._sides(u, v):
+            # A reverse graph built after the closure has no record; its roads go last
+            entries = graph.closed.pop((a, b), None) or [(graph.offsets[a + 1], weight) for _, weight in roads]
+            graph._make_resizable()
+            lo, hi = graph.offsets[a], graph.offsets[a + 1]
+            for position, weight in entries:
+                i = min(lo + position, hi)
+                graph.targets.insert(i, b)
+                graph.weights.insert(i, weight)
+                hi += 1
+            graph._shift_offsets(a, len(entries))
+
+    def _slots(self, u, v):
+        return [i for i in range(self.offsets[u], self.offsets[u + 1]) if self.targets[i] == v]
+
+    def _sides(self, u, v):
+        # This graph and, if built, its reverse, each with the road's direction
+        sides = [(self, u, v)]
+        if self._reverse is not None:
+            sides.append((self._reverse, v, u))
+        return sides
+
+    def _shift_offsets(self, u, count):
+        offsets = self.offsets
+        for k in range(u + 1, len(offsets)):
+            offsets[k] += count
+
+    def _make_resizable(self):
+        # Graphs viewing shared or mapped memory get private arrays before an edit
+        if not isinstance(self.targets, array):
+            self.offsets = array('l', self.offsets)
+            self.targets = array('l', self.targets)
+            self.weights = array(self.weight_code, self.weights)
+
+    def path_names(self, path):
+        if path is None:
+            return None
+        return [self.names[u] for u in path]
+
+    def nbytes(self):
+        return (
+            self.offsets.itemsize * len(self.offsets)
+            + self.targets.itemsize * len(self.targets)
+            + self.weights.itemsize * len(self.weights)
+        )
@@ -0,0 +1,434 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import graph_search
+from landmarks import LandmarkHeuristic
+from road_file import RoadFile
+from search_stats import measure
+
+# Strategies a query may name, on top of graph_search.route's
+STRATEGIES = (*graph_search.STRATEGIES, 'astar', 'multi')
+
+# Largest request body accepted, in bytes
+MAX_BODY = 16 << 20
+
+# Workers start from a fresh interpreter: forked ones would inherit the
+# service's open connections and hold them open after the service closes them
+_WORKER_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+class RouteService:
+    """Answers route queries over one road network file, kept loaded between requests.
+
+    Queries are dicts such as {"strategy": "ucs", "start": "Adama", "goal": "Dilla"}.
+    Strategies are those of graph_search.route, 'bfs_weighted' (= 'ucs'),
+    'astar' (landmark heuristic) and 'multi', which visits every city of
+    "goals" by always heading for the nearest remaining one. Each answer holds
+    the path and cost (None for no route), the SearchStats of its search, the
+    time it waited for a batch, the batch size and the generation (reload
+    count) of the network that answered, or an "error".
+
+    Queries wait in a queue and go to the workers in batches: whatever has
+    arrived when a worker frees up (at most ``max_batch``, after lingering
+    ``batch_window`` seconds for more), so a busy service pays one hand-off
+    per batch instead of per query. ``workers`` processes (None: one per CPU)
+    each map the road file themselves; 0 answers in one thread of this
+    process. The file is polled every ``reload_interval`` seconds; when it is
+    replaced, the new network and its landmarks are loaded alongside the old
+    one, new queries switch over, and the old workers are retired once their
+    batches are answered.
+    """
+
+    def __init__(self, path, workers=None, landmarks=4, max_batch=256, batch_window=0.0, reload_interval=1.0):
+        self.path = path
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.landmark_count = landmarks
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.reload_interval = reload_interval
+        self.generation = None
+        self.served = 0
+        self._queue = None
+        self._tasks = []
+        self._reloading = None
+
+    async def start(self):
+        """Loads the network and starts batching; called by ``serve``."""
+        self._queue = asyncio.Queue()
+        self._reloading = asyncio.Lock()
+        self.generation = await asyncio.to_thread(_Generation, self.path, 1, self.workers, self.landmark_count)
+        self._tasks = [asyncio.create_task(self._batch_loop())]
+        if self.reload_interval:
+            self._tasks.append(asyncio.create_task(self._watch_file()))
+
+    async def close(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.generation is not None:
+            await asyncio.to_thread(self.generation.close)
+
+    async def query(self, query):
+        """Answers one query dict (see the class docstring)."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((query, future, time.perf_counter()))
+        return await future
+
+    async def reload(self):
+        """Switches to the current contents of the file; the old network serves until then.
+
+        One reload runs at a time; a reload requested meanwhile waits for it.
+        """
+        async with self._reloading:
+            old = self.generation
+            generation = await asyncio.to_thread(
+                _Generation, self.path, old.number + 1, self.workers, self.landmark_count
+            )
+            self.generation = generation
+            print(f'Loaded {self.path}: {generation.info()}', file=sys.stderr)
+            await old.retire()
+
+    def info(self):
+        return {**self.generation.info(), 'served': self.served, 'queued': self._queue.qsize()}
+
+    async def _watch_file(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                changed = _file_signature(self.path) != self.generation.signature
+            except OSError:
+                continue  # Missing for a moment while being replaced
+            if changed:
+                try:
+                    await self.reload()
+                except (OSError, ValueError) as error:
+                    # Keep serving the old network; try again once the file changes again
+                    print(f'Reload of {self.path} failed: {error}', file=sys.stderr)
+                    try:
+                        self.generation.signature = _file_signature(self.path)
+                    except OSError:
+                        pass  # Gone; the next check retries once it is back
+
+    async def _reload_on_signal(self):
+        try:
+            await self.reload()
+        except (OSError, ValueError) as error:
+            print(f'Reload of {self.path} failed: {error}', file=sys.stderr)
+
+    async def _batch_loop(self):
+        # At most two batches per worker in flight; the rest of the queue waits
+        # and so forms bigger batches under load
+        slots = asyncio.Semaphore(2 * max(self.workers, 1))
+        while True:
+            batch = [await self._queue.get()]
+            if self.batch_window:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await slots.acquire()
+            # Counted now, so the generation cannot retire before the batch runs
+            generation = self.generation
+            generation.batches += 1
+            # Kept until answered, like the reload tasks; close() cancels any left
+            task = asyncio.create_task(self._answer_batch(generation, batch))
+            self._tasks.append(task)
+            task.add_done_callback(self._tasks.remove)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _answer_batch(self, generation, batch):
+        started = time.perf_counter()
+        try:
+            answers = await generation.answer([query for query, _, _ in batch])
+        except Exception as error:  # A broken worker pool fails the batch, not the service
+            answers = [{'error': f'Search failed: {error!r}'}] * len(batch)
+        for (_, future, queued), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result({
+                    **answer, 'queue_time': started - queued, 'batch': len(batch), 'generation': generation.number,
+                })
+        self.served += len(batch)
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """Serves HTTP and JSON lines on ``host``:``port`` until cancelled.
+
+        HTTP: GET /health describes the loaded network; POST /route takes one
+        query, or {"queries": [...]} answered as {"results": [...]}. Connections
+        are kept alive. A connection whose first line is a JSON object is in
+        JSON lines mode instead: one query per line, answers in the same order.
+        SIGHUP forces a reload where the platform has it.
+        """
+        await self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, self._signal_reload)
+        except (AttributeError, NotImplementedError):
+            pass  # No SIGHUP (Windows) or not the main thread
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_BODY)
+        print(f'Serving {self.path} on {host}:{port}: {self.generation.info()}', file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    def _signal_reload(self):
+        # The task is kept until done; the loop itself holds only a weak reference
+        task = asyncio.create_task(self._reload_on_signal())
+        self._tasks.append(task)
+        task.add_done_callback(self._tasks.remove)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            first = await reader.readline()
+            if first.lstrip().startswith(b'{'):
+                await self._serve_lines(first, reader, writer)
+            else:
+                await self._serve_http(first, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass  # Client went away or sent something unparsable
+        finally:
+            writer.close()
+
+    async def _serve_lines(self, line, reader, writer):
+        # Answers are written in query order while later lines are already queued
+        pending = asyncio.Queue()
+
+        async def write_answers():
+            while True:
+                answer = await pending.get()
+                if answer is None:
+                    return
+                writer.write(json.dumps(await answer).encode() + b'\n')
+                await writer.drain()
+
+        writer_task = asyncio.create_task(write_answers())
+        try:
+            while line:
+                if line.strip():
+                    pending.put_nowait(asyncio.ensure_future(self._line_answer(line)))
+                line = await reader.readline()
+        finally:
+            pending.put_nowait(None)
+            await writer_task
+
+    async def _line_answer(self, line):
+        try:
+            query = json.loads(line)
+        except ValueError as error:
+            return {'error': f'Invalid JSON: {error}'}
+        return await self.query(query) if isinstance(query, dict) else {'error': 'A query must be a JSON object.'}
+
+    async def _serve_http(self, request_line, reader, writer):
+        while request_line:
+            method, target, version = request_line.decode('latin-1').split(None, 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY:
+                status, body = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body too large.'}
+                headers['connection'] = 'close'
+            else:
+                status, body = await self._http_response(method, target, await reader.readexactly(length))
+
+            keep_alive = headers.get('connection', '').lower() != 'close' and version.strip() == 'HTTP/1.1'
+            payload = json.dumps(body).encode()
+            writer.write(
+                f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                return
+            request_line = await reader.readline()
+
+    async def _http_response(self, method, target, body):
+        path = target.split('?', 1)[0]
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, self.info()
+        if path != '/route':
+            return HTTPStatus.NOT_FOUND, {'error': f'No such endpoint {path}.'}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'Use POST for /route.'}
+        try:
+            request = json.loads(body)
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {'error': f'Invalid JSON: {error}'}
+        if isinstance(request, dict) and isinstance(request.get('queries'), list):
+            queries = request['queries']
+            answers = await asyncio.gather(*[
+                self.query(query) if isinstance(query, dict) else _error('A query must be a JSON object.')
+                for query in queries
+            ])
+            return HTTPStatus.OK, {'results': answers}
+        if not isinstance(request, dict):
+            return HTTPStatus.BAD_REQUEST, {'error': 'A query must be a JSON object.'}
+        answer = await self.query(request)
+        return (HTTPStatus.BAD_REQUEST if 'error' in answer else HTTPStatus.OK), answer
+
+
+async def _error(message):
+    return {'error': message}
+
+
+def _file_signature(path):
+    # Changes whenever the file is rewritten or replaced (write_road_file renames)
+    status = os.stat(path)
+    return status.st_ino, status.st_size, status.st_mtime_ns
+
+
+class _Generation:
+    """One loaded version of the road file with the workers answering on it."""
+
+    def __init__(self, path, number, workers, landmark_count):
+        self.number = number
+        self.signature = _file_signature(path)
+        self.file = RoadFile(path)
+        self.batches = 0  # Batches dispatched to this network and not answered yet
+        self.idle = None  # Set once retired and no batch is left
+        heuristic = LandmarkHeuristic(self.file.graph, landmark_count)
+        landmarks = (heuristic.landmarks, heuristic.from_landmark, heuristic.to_landmark)
+        if workers:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=_WORKER_CONTEXT,
+                initializer=_init_worker, initargs=(path, self.signature, landmarks),
+            )
+            self.router = None
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+            self.router = _Router(self.file, landmarks)
+
+    def info(self):
+        graph = self.file.graph
+        return {'generation': self.number, 'cities': len(graph), 'roads': graph.num_edges}
+
+    async def answer(self, queries):
+        # The caller has counted the batch in ``batches`` when dispatching it
+        loop = asyncio.get_running_loop()
+        try:
+            if self.router is not None:
+                return await loop.run_in_executor(self.executor, self.router.answer, queries)
+            return await loop.run_in_executor(self.executor, _answer_in_worker, queries)
+        finally:
+            self.batches -= 1
+            if self.idle is not None and not self.batches:
+                self.idle.set()
+
+    async def retire(self):
+        # Waits for the batches still running on this network, then frees it
+        self.idle = asyncio.Event()
+        if self.batches:
+            await self.idle.wait()
+        await asyncio.to_thread(self.close)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.router = None
+        self.file.close()
+
+
+class _Router:
+    """Answers batches of query dicts on one road network."""
+
+    def __init__(self, road_file, landmarks):
+        self.graph = road_file.graph
+        self.heuristic = LandmarkHeuristic.from_arrays(self.graph, *landmarks)
+
+    def answer(self, queries):
+        return [self._answer(query) for query in queries]
+
+    def _answer(self, query):
+        graph = self.graph
+        strategy = query.get('strategy', 'ucs')
+        if strategy == 'bfs_weighted':
+            strategy = 'ucs'
+        if strategy not in STRATEGIES:
+            return {'error': f"Invalid strategy {strategy!r}. Use one of {', '.join(STRATEGIES)}."}
+        goals = (query.get('goals') or []) if strategy == 'multi' else [query.get('goal')]
+        if not isinstance(goals, list):
+            return {'error': '"goals" must be a list of cities.'}
+        names = [query.get('start'), *goals]
+        unknown = [name for name in names if not isinstance(name, str) or name not in graph.index]
+        if unknown:
+            return {'error': f'Unknown cities: {", ".join(map(str, unknown))}.'}
+        ids = [graph.index[name] for name in names]
+
+        with measure(True) as stats:
+            if strategy == 'multi':
+                path, cost = self._tour(ids[0], ids[1:], stats)
+            elif strategy == 'astar':
+                path, cost = graph_search.a_star(graph, ids[0], ids[1], self.heuristic.estimates(ids[1]), stats=stats)
+            else:
+                path, cost = graph_search.route(graph, ids[0], ids[1], strategy, stats=stats)
+        return {
+            'path': graph.path_names(path),
+            'cost': cost if path is not None else None,
+            'stats': stats.as_dict(),
+        }
+
+    def _tour(self, start, goals, stats):
+        # Greedy: a partial UCS from the current city to the nearest goal left
+        remaining = set(goals) - {start}
+        path, cost = [start], 0
+        while remaining:
+            goal, leg_cost, leg = graph_search.nearest_target(self.graph, path[-1], remaining, stats=stats)
+            if goal is None:
+                return None, None
+            path.extend(leg[1:])
+            cost += leg_cost
+            remaining.difference_update(leg)
+        return path, cost
+
+
+# Router of a pool worker, over its own mapping of the road file
+_router = None
+
+
+def _init_worker(path, signature, landmarks):
+    global _router
+    road_file = RoadFile(path)
+    if _file_signature(path) != signature:
+        # Replaced since the service loaded it; the service is already reloading
+        raise RuntimeError(f'{path} changed while starting workers.')
+    _router = _Router(road_file, landmarks)
+
+
+def _answer_in_worker(queries):
+    return _router.answer(queries)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serves route queries over a road network file.')
+    parser.add_argument('path', help='road network file (see road_file.py)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU, 0: in process)')
+    parser.add_argument('--landmarks', type=int, default=4, help='landmark cities for the A* heuristic')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--batch-window', type=float, default=0.0, help='seconds a batch waits for more queries')
+    parser.add_argument('--reload-interval', type=float, default=1.0, help='seconds between file checks, 0 for none')
+    args = parser.parse_args()
+
+    service = RouteService(args.path, args.workers, args.landmarks, args.max_batch, args.batch_window,
+                           args.reload_interval)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
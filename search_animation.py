@@ -0,0 +1,219 @@
+import itertools
+import subprocess
+
+import matplotlib as mpl
+from matplotlib.animation import FuncAnimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+import networkx as nx
+import numpy as np
+
+
+def animate_search(G, pos, order, title, goals=(), stop_at=(), interval=150, output=None, fps=None,
+                   figsize=(10, 8)):
+    """Replays a search's visit order on a drawing of ``G``.
+
+    Edges, labels and the cities (goals green, the rest blue) are drawn once as
+    a still background. A frame only draws a red marker on the current city,
+    the labels it covers and the title, and blits that over the background.
+    The replay ends after the first city in ``stop_at``.
+
+    Without ``output`` the animation is returned for plt.show(). With it, the
+    frames are written to that file instead (.gif through Pillow, other
+    extensions such as .mp4 through ffmpeg) at ``fps`` frames per second and
+    None is returned. The default fps is 1000 / interval. No window or display
+    is needed, and frames are written as they are drawn rather than kept.
+    """
+    frames = []
+    for node in order:
+        frames.append(node)
+        if node in stop_at:
+            break
+    frames = frames or [None]  # Still one (unhighlighted) frame for an empty search
+
+    # An off-screen figure when writing a file, so no GUI backend is touched
+    if output is not None:
+        fig = Figure(figsize=figsize)
+    else:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot()
+    ax.set_axis_off()
+    nodes = list(G.nodes)
+    nx.draw_networkx_edges(G, pos, ax=ax)
+    labels = nx.draw_networkx_labels(G, pos, ax=ax, font_size=10)
+    xy = np.array([pos[node] for node in nodes]).reshape(-1, 2)
+    colors = np.array([to_rgba('g' if node in goals else 'b') for node in nodes]).reshape(-1, 4)
+    ax.scatter(xy[:, 0], xy[:, 1], s=100, c=colors, zorder=2)
+    marker = ax.scatter(np.empty(0), np.empty(0), s=100, c='r', zorder=2)
+    heading = _heading(fig, ax, title)
+
+    index = {node: i for i, node in enumerate(nodes)}
+    radius = np.sqrt(100) / 2 * fig.dpi / 72  # Of a city's marker, in pixels
+
+    def update(step):
+        # Moves the marker and returns the scatter index of the current city
+        city = index.get(frames[step])
+        marker.set_offsets(xy[[] if city is None else [city]])
+        heading.set_text(f"{title} - Step {step + 1}")
+        return city
+
+    if output is None:
+        covering = _Covering(ax, xy, [labels.get(node) for node in nodes], radius)
+        shown = []  # Labels redrawn over the marker in the last frame
+
+        def clear():
+            marker.set_offsets(np.empty((0, 2)))
+            heading.set_text('')
+            return marker, heading
+
+        def animate(step):
+            # A returned label is animated (left out of the background) until the next frame
+            for text in shown:
+                text.set_animated(False)
+            city = update(step)
+            shown[:] = [] if city is None else covering(city)
+            return marker, *shown, heading
+
+        return FuncAnimation(
+            fig, animate, frames=len(frames), init_func=clear, interval=interval, repeat=False, blit=True
+        )
+    frame_images = _blitted_frames(fig, ax, xy, marker, heading, update, len(frames), radius)
+    if output.lower().endswith('.gif'):
+        _save_gif(frame_images, output, fps or 1000 / interval)
+    else:
+        _save_ffmpeg(frame_images, output, fps or 1000 / interval)
+    return None
+
+
+def _heading(fig, ax, title):
+    # The title as text on a transparent axes over the whole figure: blitting
+    # restores and copies axes areas, and a title sits outside its own axes
+    overlay = fig.add_axes((0, 0, 1, 1))
+    overlay.set_axis_off()
+    overlay.set_navigate(False)  # Zooming and panning still reach the drawing
+    ax.set_title(title)
+    heading = overlay.text(0, 0, title)
+    heading.update_from(ax.title)
+    heading.set_position(ax.title.get_position())
+    ax.set_title('')
+    return heading
+
+
+class _Covering:
+    """Finds the labels that overlap a city's marker on screen."""
+
+    def __init__(self, ax, xy, texts, radius):
+        self.ax = ax
+        self.xy = xy
+        self.texts = texts
+        self.radius = radius
+        self.half_sizes = None
+
+    def __call__(self, city):
+        if self.half_sizes is None:
+            # Text sizes do not change with zoom, so they are measured once, after the first draw
+            extents = [text.get_window_extent() if text is not None else None for text in self.texts]
+            self.half_sizes = np.array([(e.width / 2, e.height / 2) if e else (-np.inf, -np.inf) for e in extents])
+        # Labels are centred on their cities; positions are taken afresh for the current view
+        centers = self.ax.transData.transform(self.xy)
+        overlaps = np.all(np.abs(centers - centers[city]) < self.half_sizes + self.radius, axis=1)
+        return [self.texts[i] for i in np.flatnonzero(overlaps)]
+
+
+def _blitted_frames(fig, ax, xy, marker, heading, update, count, radius):
+    # Yields each frame as an RGB array. The still background and, on a
+    # transparent figure, the labels alone are drawn once; a frame restores the
+    # background, draws the marker and title and blends the labels back over
+    # the marker, which is cheaper than drawing them again.
+    canvas = FigureCanvasAgg(fig)
+    marker.set_animated(True)
+    heading.set_animated(True)
+    heading.set_text('')  # Blanked rather than hidden: a hidden title loses its place
+    others = [artist for artist in [*ax.collections, *ax.patches] if artist is not marker]
+    for artist in others:
+        artist.set_visible(False)
+    fig.patch.set_alpha(0)
+    canvas.draw()
+    overlay = np.asarray(canvas.buffer_rgba()).astype(np.float32)
+    for artist in others:
+        artist.set_visible(True)
+    fig.patch.set_alpha(1)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    height, width = overlay.shape[:2]
+
+    for step in range(count):
+        city = update(step)
+        canvas.restore_region(background)
+        ax.draw_artist(marker)
+        heading.axes.draw_artist(heading)
+        frame = np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+        if city is not None:
+            # Rows of the buffer run from the top, display y from the bottom
+            x, y = ax.transData.transform(xy[city])
+            left, right = max(int(x - radius) - 1, 0), min(int(x + radius) + 2, width)
+            top, bottom = max(int(height - y - radius) - 1, 0), min(int(height - y + radius) + 2, height)
+            if left < right and top < bottom:
+                region = frame[top:bottom, left:right]
+                colors = overlay[top:bottom, left:right, :3]
+                alpha = overlay[top:bottom, left:right, 3:] / 255
+                frame[top:bottom, left:right] = (region * (1 - alpha) + colors * alpha + 0.5).astype(np.uint8)
+        yield frame
+
+
+def _save_gif(frames, output, fps):
+    from PIL import GifImagePlugin, Image
+
+    # Written frame by frame with Pillow's GIF helpers: save_all keeps every frame
+    # until the end, which long replays of big graphs do not fit in. One palette,
+    # from the first frame, serves all of them as the colours never change.
+    duration = int(1000 / fps)
+    first = next(frames)
+    palette = Image.fromarray(first).quantize(colors=255, method=Image.Quantize.MAXCOVERAGE)  # Keeps white exact
+    previous = np.asarray(palette)
+    with open(output, 'wb') as file:
+        header, _ = GifImagePlugin.getheader(palette, info={'loop': 0, 'duration': duration})
+        file.write(b''.join(header))
+        file.write(b''.join(GifImagePlugin.getdata(palette, duration=duration)))
+        for frame in frames:
+            image = Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE)
+            pixels = np.asarray(image)
+            # Only the part that changed since the last frame is stored
+            rows = np.flatnonzero((pixels != previous).any(axis=1))
+            columns = np.flatnonzero((pixels != previous).any(axis=0))
+            if len(rows):
+                box = (int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1)
+            else:
+                box = (0, 0, 1, 1)
+            file.write(b''.join(GifImagePlugin.getdata(image.crop(box), box[:2], duration=duration)))
+            previous = pixels
+        file.write(b';')
+
+
+def _save_ffmpeg(frames, output, fps):
+    # Raw frames piped to ffmpeg, with the arguments matplotlib's FFMpegWriter uses
+    first = next(frames)
+    height, width = first.shape[:2]
+    codec = mpl.rcParams['animation.codec']
+    command = [
+        str(mpl.rcParams['animation.ffmpeg_path']), '-f', 'rawvideo', '-vcodec', 'rawvideo',
+        '-s', f'{width}x{height}', '-pix_fmt', 'rgb24', '-framerate', str(fps), '-loglevel', 'error',
+        '-i', 'pipe:', '-vcodec', codec,
+    ]
+    if codec == 'h264':
+        # yuv420p (for players) needs even dimensions
+        command += ['-pix_fmt', 'yuv420p', '-vf', 'pad=width=ceil(iw/2)*2:height=ceil(ih/2)*2']
+    command += [*mpl.rcParams['animation.ffmpeg_args'], '-y', output]
+    with subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        try:
+            for frame in itertools.chain([first], frames):
+                process.stdin.write(frame.tobytes())
+            process.stdin.close()
+        except BrokenPipeError:
+            pass  # ffmpeg quit; its error is reported below
+        error = process.stderr.read().decode(errors='replace')
+    if process.returncode:
+        raise RuntimeError(f'ffmpeg failed to write {output}: {error.strip()}')
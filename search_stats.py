@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+import time
+import tracemalloc
+
+
+class SearchStats:
+    """Work done by one search (or a group of searches sharing the object).
+
+    expanded       cities taken off the frontier and expanded
+    pushes / pops  frontier operations
+    stale_pops     pops of entries that were already settled or superseded
+    peak_frontier  largest frontier size seen (recursion depth for minimax)
+    peak_memory    bytes allocated at the peak, only with memory tracking on
+    wall_time      seconds spent inside ``measure``
+    """
+
+    __slots__ = ('expanded', 'pushes', 'pops', 'stale_pops', 'peak_frontier', 'peak_memory', 'wall_time')
+
+    def __init__(self):
+        self.expanded = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.peak_frontier = 0
+        self.peak_memory = None
+        self.wall_time = 0.0
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        fields = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)
+        return f'SearchStats({fields})'
+
+
+@contextmanager
+def measure(track=True):
+    """Yields a SearchStats to pass to the engines, or None when ``track`` is false.
+
+    ``track='memory'`` also records peak allocations with tracemalloc, which slows
+    the search down noticeably. With tracking off the engines pay one
+    ``is not None`` test per frontier operation.
+    """
+    if not track:
+        yield None
+        return
+    stats = SearchStats()
+    memory = track == 'memory'
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_time = time.perf_counter() - started
+        if memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if tracing:
+            tracemalloc.stop()
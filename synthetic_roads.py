@@ -0,0 +1,104 @@
+import math
+import random
+
+
+def random_road_network(n, seed=0, extra_roads=0.3, scale=10, cost_to=None):
+    """Seeded connected road network of ``n`` cities that looks like a road map.
+
+    Cities sit on a jittered square grid. A random spanning tree of the roads
+    between grid neighbours (right, down and one diagonal per cell, so no two
+    roads cross) keeps every city reachable, and each other neighbour road is
+    added with probability ``extra_roads`` (about 3.2 roads per city by
+    default). Roads run both ways; a road is ``scale`` times its straight-line
+    length, rounded up to an integer.
+
+    Returns (cities, roads, coordinates) with roads in the usual adjacency-list
+    layout and coordinates usable as graph_layout coordinates. With ``cost_to``
+    (a city name) the roads use the {'cost', 'neighbors'} layout instead, where
+    'cost' is the straight-line distance to that city rounded down, an
+    admissible A* heuristic. City names sort in id order.
+    """
+    rng = random.Random(seed)
+    side = math.isqrt(max(n - 1, 0)) + 1
+    width = len(str(max(n - 1, 0)))
+    cities = [f'c{i:0{width}d}' for i in range(n)]
+    x = [i % side + rng.uniform(-0.35, 0.35) for i in range(n)]
+    y = [i // side + rng.uniform(-0.35, 0.35) for i in range(n)]
+
+    candidates = []
+    for i in range(n):
+        column = i % side
+        if column + 1 < side and i + 1 < n:
+            candidates.append((i, i + 1))
+        if i + side < n:
+            candidates.append((i, i + side))
+        if column + 1 < side and i + side + 1 < n:
+            # One of the two diagonals of the grid cell below and right of i
+            candidates.append((i, i + side + 1) if rng.random() < 0.5 else (i + 1, i + side))
+    rng.shuffle(candidates)
+
+    parent = list(range(n))
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    neighbors = [[] for _ in range(n)]
+    for u, v in candidates:
+        root_u, root_v = find(u), find(v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+        elif rng.random() >= extra_roads:
+            continue
+        length = max(1, math.ceil(scale * math.hypot(x[u] - x[v], y[u] - y[v])))
+        neighbors[u].append((cities[v], length))
+        neighbors[v].append((cities[u], length))
+
+    coordinates = {city: (x[i], y[i]) for i, city in enumerate(cities)}
+    if cost_to is None:
+        roads = {city: neighbors[i] for i, city in enumerate(cities)}
+    else:
+        gx, gy = coordinates[cost_to]
+        roads = {
+            city: {'cost': math.floor(scale * math.hypot(x[i] - gx, y[i] - gy)), 'neighbors': neighbors[i]}
+            for i, city in enumerate(cities)
+        }
+    return cities, roads, coordinates
+
+
+def random_game_tree(n, seed=0, branching=(2, 4), adversary=0.1, max_utility=10):
+    """Seeded game tree of ``n`` cities in the {'utility', 'terminal', 'neighbors'} layout.
+
+    The tree grows breadth first from the root (the first city), giving each
+    city between ``branching`` children until ``n`` cities exist. Like the
+    hand-made map, every road has a road back to the parent. An inner city has
+    one adversary road down with probability ``adversary``, which makes it a
+    dead end for the searches. Leaves are terminal with a utility between 1 and
+    ``max_utility``; inner cities have utility 0.
+    """
+    rng = random.Random(seed)
+    width = len(str(max(n - 1, 0)))
+    cities = [f'g{i:0{width}d}' for i in range(n)]
+    neighbors = [[] for _ in range(n)]
+    size = min(n, 1)
+    for city in range(n):
+        if size >= n:
+            break
+        children = range(size, min(size + rng.randint(*branching), n))
+        blocked = rng.choice(children) if rng.random() < adversary else None
+        for child in children:
+            neighbors[city].append((cities[child], child == blocked))
+            neighbors[child].append((cities[city], False))
+        size = children.stop
+
+    roads = {}
+    for i, city in enumerate(cities):
+        leaf = len(neighbors[i]) <= (1 if i else 0)
+        roads[city] = {
+            'utility': rng.randint(1, max_utility) if leaf else 0,
+            'neighbors': neighbors[i],
+            'terminal': leaf,
+        }
+    return roads
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Loads a script and runs a path query on it in a fresh interpreter, then
+# reports how long that took and which plotting modules got imported along the way
+CHECK = '''
+import importlib.util, json, sys, time
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location('script', {script!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+{query}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'elapsed': elapsed, 'plotting': [name for name in ('networkx', 'matplotlib') if name in sys.modules]}}))
+'''
+
+# What a script's startup cost before drawing was made lazy: the plotting stack alone
+PLOTTING = '''
+import time
+started = time.perf_counter()
+import matplotlib.pyplot, networkx
+print(time.perf_counter() - started)
+'''
+
+QUERIES = {
+    'Assignment_two.py': "module.uninformed_path_finder(module.cities, module.roads, 'Addis Ababa', 'Mekelle', 'bfs')",
+    'Traveling_Ethiopia_One.py': "module.TravelEthiopia(module.cities, module.roads).bfs('Moyale', 'Nairobi')",
+    'Traveling_Ethiopia_Two(2.2).py': "module.TravelEthiopia(module.cities, module.roads).ucs('Addis Ababa', 'Nairobi')",
+    'Traveling_Ethiopia_Two(2.3).py':
+        "module.TravelEthiopia(module.cities, module.roads, 'Addis Ababa', module.goals).multi_goal_ucs()",
+    'Traveling_Ethiopia_Three.py': "module.AStarSearchVisualizer(module.roads).a_star_search('Addis Ababa', 'Moyale')",
+}
+
+
+def run(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True).stdout
+
+
+@pytest.fixture(scope='module')
+def plotting_import_time():
+    return float(run(PLOTTING))
+
+
+@pytest.mark.parametrize('script', sorted(QUERIES))
+def test_path_queries_skip_plotting_imports(script, plotting_import_time):
+    result = json.loads(run(CHECK.format(script=os.path.join(HERE, script), query=QUERIES[script])))
+    assert result['plotting'] == [], f'{script} imported {" ".join(result["plotting"])}'
+    # Measured against the plotting import on the same machine, so a slow box does not
+    # fail it, while a heavy import creeping back into startup does
+    assert result['elapsed'] < plotting_import_time / 2, (
+        f'{script} took {result["elapsed"]:.3f}s to import and answer a query; '
+        f'importing the plotting stack takes {plotting_import_time:.3f}s'
+    )
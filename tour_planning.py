@@ -0,0 +1,208 @@
+import heapq
+
+import numpy as np
+
+from graph_search import bfs, breadth_first_tree, depth_first_tree, nearest_target, reconstruct_path, ucs
+
+
+def held_karp(costs):
+    """Cheapest open route that starts at node 0 and visits every other node once.
+
+    ``costs`` is a square table of pairwise distances (inf where there is no path).
+    Returns (order, cost) where order lists nodes 1..k in visiting order; cost is
+    inf if the nodes cannot all be reached. Runs in O(2^k * k^2) time and
+    O(2^k * k) memory, vectorized over all subsets of the same size.
+    """
+    costs = np.asarray(costs, dtype=float)
+    k = len(costs) - 1
+    if k <= 0:
+        return [], 0
+
+    # best[mask, j]: cheapest way to leave node 0, visit exactly the goals in
+    # ``mask`` and stop at goal j (goal j is node j + 1 of the table)
+    legs = costs[1:, 1:]
+    best = np.full((1 << k, k), np.inf)
+    parent = np.full((1 << k, k), -1, dtype=np.int8)  # k stays far below 127 in practice
+    goals = np.arange(k)
+    best[1 << goals, goals] = costs[0, 1:]
+
+    masks = np.arange(1 << k)
+    sizes = np.zeros(1 << k, dtype=np.int8)
+    for j in range(k):
+        sizes += (masks >> j) & 1
+
+    for size in range(2, k + 1):
+        layer = masks[sizes == size]
+        for j in range(k):
+            with_j = layer[(layer >> j) & 1 == 1]
+            # Extend every route over ``with_j`` minus j by the leg into j
+            candidates = best[with_j ^ (1 << j)] + legs[:, j]
+            previous = candidates.argmin(axis=1)
+            best[with_j, j] = candidates[np.arange(len(with_j)), previous]
+            parent[with_j, j] = previous
+
+    full = (1 << k) - 1
+    last = int(best[full].argmin())
+    cost = best[full, last]
+    if not np.isfinite(cost):
+        return None, float('inf')
+
+    # Walk the parent table back from the cheapest final goal
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        last, mask = int(parent[mask, last]), mask ^ (1 << last)
+    order.reverse()
+    return order, cost
+
+
+def optimal_goal_tour(matrix, start, goals):
+    """Shortest route from ``start`` through every city id in ``goals`` (any order).
+
+    ``matrix`` is a DistanceMatrix whose sources include ``start`` and all goals.
+    Returns (path, cost) with path as city ids, or (None, inf) if a goal is unreachable.
+    """
+    goals = [goal for goal in dict.fromkeys(goals) if goal != start]
+    stops = [start] + goals
+    rows = [matrix.row[city] for city in stops]
+    order, _ = held_karp(matrix.distances[np.ix_(rows, stops)])
+    if order is None:
+        return None, float('inf')
+
+    path = [start]
+    cost = 0
+    for stop in order:
+        leg = matrix.path(path[-1], stops[stop])
+        path.extend(leg[1:])
+        cost += matrix.distance(leg[0], leg[-1])
+    return path, cost
+
+
+def coverage_walk(graph, start, cities=None, strategy='ucs'):
+    """Walk from ``start`` that passes through every city id in ``cities`` (default: all).
+
+    The walk follows a spanning tree depth first and turns back along each tree
+    road once its subtree is covered, skipping subtrees without wanted cities and
+    stopping at the last one. The tree is a minimum spanning tree of road lengths
+    for 'ucs' and a DFS tree for the hop-count strategies 'bfs'/'dfs', so on a
+    symmetric road network the walk costs at most twice the optimal one, and
+    building it takes O(E log V).
+
+    On one-way roads a subtree may have no way back to its parent. Children
+    without a direct road back are therefore entered last, and if the walk
+    still gets stuck it finishes by heading for the nearest wanted city left,
+    as the greedy traversal does.
+
+    Returns (path, cost, unreachable): unreachable lists the wanted cities the
+    walk cannot reach, those unreachable from ``start`` and any stranded behind
+    a one-way road; the walk covers all the others.
+    """
+    weighted = strategy == 'ucs'
+    if not weighted and strategy not in ('bfs', 'dfs'):
+        raise ValueError(f"Invalid strategy {strategy!r}. Use 'bfs', 'dfs' or 'ucs'.")
+    wanted = set(range(len(graph))) if cities is None else set(cities)
+
+    children = _minimum_spanning_tree(graph, start) if weighted else _dfs_tree(graph, start)
+    unreachable = sorted(wanted.difference(children))
+
+    # A subtree is worth entering only if it holds a wanted city
+    needed = set()
+    for city in reversed(list(children)):
+        if city in wanted or any(child in needed for child, _ in children[city]):
+            needed.add(city)
+
+    path = [start]
+    cost = 0
+    left = wanted.intersection(children) - {start}
+    stack = [(start, _children_in_order(graph, children, start))]
+    while left:
+        city, pending = stack[-1]
+        for child, length in pending:
+            if child in needed:
+                break
+        else:
+            # Subtree covered: go back to the parent
+            stack.pop()
+            leg, leg_cost = _road_back(graph, city, stack[-1][0], weighted)
+            if leg is None:
+                cost, stranded = _nearest_first(graph, path, cost, left, weighted)
+                return path, cost, sorted(unreachable + stranded)
+            path.extend(leg[1:])
+            cost += leg_cost
+            left.difference_update(leg)
+            continue
+        path.append(child)
+        cost += length
+        left.discard(child)
+        stack.append((child, _children_in_order(graph, children, child)))
+
+    return path, cost, unreachable
+
+
+def _children_in_order(graph, children, city):
+    # Children with a road straight back first: the walk can only end in the others
+    return iter(sorted(children[city], key=lambda entry: not graph.has_road(entry[0], city)))
+
+
+def _nearest_first(graph, path, cost, left, weighted):
+    # Extends ``path`` to the nearest city of ``left`` until none is left or
+    # reachable; returns the new cost and the cities that could not be reached
+    while left:
+        if weighted:
+            target, leg_cost, leg = nearest_target(graph, path[-1], left)
+        else:
+            came_from = breadth_first_tree(graph, path[-1])
+            target = next((city for city in came_from if city in left), None)  # In BFS (hop) order
+            leg = None if target is None else reconstruct_path(came_from, target)
+        if target is None:
+            return cost, sorted(left)
+        path.extend(leg[1:])
+        cost += leg_cost if weighted else len(leg) - 1
+        left.difference_update(leg)
+    return cost, []
+
+
+def _minimum_spanning_tree(graph, start):
+    # Prim's algorithm over outgoing roads; {city: [(child, road length), ...]}
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    children = {}
+    frontier = [(0, start, None)]
+    while frontier:
+        length, city, parent = heapq.heappop(frontier)
+        if city in children:
+            continue
+        children[city] = []
+        if parent is not None:
+            children[parent].append((city, length))
+        for i in range(offsets[city], offsets[city + 1]):
+            if targets[i] not in children:
+                heapq.heappush(frontier, (weights[i], targets[i], city))
+    return children
+
+
+def _dfs_tree(graph, start):
+    # Depth-first tree with every road counted as one hop
+    came_from = depth_first_tree(graph, start)
+    children = {city: [] for city in came_from}
+    for city, parent in came_from.items():
+        if parent is not None:
+            children[parent].append((city, 1))
+    return children
+
+
+def _road_back(graph, city, parent, weighted):
+    # Direct road back to the tree parent if there is one, else the shortest
+    # detour; (None, None) if the parent cannot be reached from ``city``
+    lo, hi = graph.offsets[city], graph.offsets[city + 1]
+    lengths = [graph.weights[i] for i in range(lo, hi) if graph.targets[i] == parent]
+    if lengths:
+        return [city, parent], min(lengths) if weighted else 1
+    if weighted:
+        path, cost = ucs(graph, city, parent)
+    else:
+        path = bfs(graph, city, parent)
+        cost = len(path) - 1 if path else None
+    if path is None:
+        return None, None
+    return path, cost
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+from distance_matrix import DistanceMatrix
+
+
+class TreeCache:
+    """LRU cache of single-source shortest-path trees on one RoadGraph.
+
+    Each tree is a one-row DistanceMatrix (cost and predecessor of every city),
+    so any goal is answered from a cached source by walking predecessors. Least
+    recently used trees are dropped once the cache holds more than ``max_bytes``.
+    """
+
+    def __init__(self, graph, max_bytes=16 << 20, strategy='ucs'):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.strategy = strategy
+        self.trees = OrderedDict()  # source id -> DistanceMatrix
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+    def __contains__(self, source):
+        return source in self.trees
+
+    def tree(self, source, order=None, queue='heap', stats=None):
+        """The search tree of ``source``, built (expanding into ``order``) on a miss."""
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(source)
+            return tree
+        self.misses += 1
+        tree = DistanceMatrix(self.graph, [source], self.strategy, order, stats, queue)
+        self.trees[source] = tree
+        self.nbytes += tree.nbytes()
+        # A tree bigger than the whole budget is handed back without being kept
+        self._evict()
+        return tree
+
+    def resize(self, max_bytes):
+        # Changes the budget, dropping least recently used trees that no longer fit
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, old = self.trees.popitem(last=False)
+            self.nbytes -= old.nbytes()
+
+    def repair(self, u, v):
+        # Keeps the cached trees valid after the roads u -> v changed in place
+        for tree in self.trees.values():
+            tree.repair(u, v)
+
+    def clear(self):
+        self.trees.clear()
+        self.nbytes = 0